@@ -691,7 +691,10 @@ def create_app() -> Flask:
 
         # Add evolved strategies (top 20, only profitable ones)
         try:
-            evolved_strategies = store.list_evolved_strategies(symbol=None, min_score=0.0, limit=20)
+            evolved_strategies = store.list_evolved_strategies(
+                symbol=None, min_score=0.0, limit=20,
+                columns=("id", "genome", "symbol", "score", "generation"),
+            )
             for e in evolved_strategies:
                 # Create a short preview of the genome
                 genome = e["genome"]
@@ -750,11 +753,12 @@ def create_app() -> Flask:
             }), 400
 
         try:
-            # Clear all trades and decision log
-            with store._lock:
+            # Clear all trades and decision log (write queued trades first so
+            # none land after the DELETE)
+            store.flush_trades()
+            with store._write():
                 store._conn.execute("DELETE FROM trades")
                 store._conn.execute("DELETE FROM equity_history")
-                store._conn.commit()
 
             # Clear decision log
             from app.bots import clear_decision_log
@@ -767,10 +771,9 @@ def create_app() -> Flask:
 
             if orphaned_bots:
                 print(f"\n🧹 Cleaning up {len(orphaned_bots)} orphaned bot records from database...")
-                with store._lock:
+                with store._write():
                     for bot_name in orphaned_bots:
                         store._conn.execute("DELETE FROM bots WHERE name = ?", (bot_name,))
-                    store._conn.commit()
                 print(f"✓ Deleted orphaned bots: {', '.join(orphaned_bots[:5])}{' ...' if len(orphaned_bots) > 5 else ''}\n")
 
             # Count ACTUAL bots currently running (not hardcoded grid logic)
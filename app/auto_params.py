@@ -9,7 +9,9 @@ from typing import Dict, List, Tuple, Callable, Any
 
 from app.core import Bar, DataProvider
 from app.managers import StrategyManager, PortfolioManager
-from app.strategies import MeanReversion, Breakout, TrendFollow, MR_GRID, BO_GRID, TF_GRID
+from app.strategies import (
+    MeanReversion, Breakout, TrendFollow, MR_GRID, BO_GRID, TF_GRID, NUMPY_AVAILABLE, bar_arrays,
+)
 
 ScoreFn = Callable[[List[Bar], Dict[str, Any]], float]
 
@@ -43,10 +45,12 @@ def _exposures_for_strategy(strategy_name: str, params: Dict[str, Any], bars: Li
         s = Breakout(**params)
     else:
         s = TrendFollow(**params)
-    exps: List[float] = []
-    # feed cumulatively like live run
-    for i in range(1, len(bars) + 1):
-        exps.append(float(s.on_bar(bars[:i])))
+    # Strategies keep their rolling windows between calls, so once warmed up,
+    # feeding one new bar per step matches re-feeding every prefix without the
+    # O(n^2) pushes; it is also exactly what the vectorized on_bars_batch computes.
+    if NUMPY_AVAILABLE:
+        return s.on_bars_batch(bar_arrays(bars))[1:].tolist()
+    exps = [float(s.on_bar((b,))) for b in bars]
     return exps[1:]  # align to returns length
 
 
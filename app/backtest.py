@@ -6,6 +6,7 @@ import math
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
 from app.core import Bar, Strategy, DataProvider
+from app.strategies import NUMPY_AVAILABLE, bar_arrays
 
 
 # Number of bars in a calendar year for each timeframe, used to annualize the
@@ -126,15 +127,6 @@ class Backtester:
         Returns:
             BacktestMetrics with performance statistics
         """
-        # Reset state
-        self.cash = self.initial_capital
-        self.position = 0.0
-        self.avg_price = 0.0
-        self.trades = []
-        self.equity_curve = []
-        self.bars_processed = []
-        self.timeframe = timeframe  # used to annualize the Sharpe ratio correctly
-
         # Fetch historical bars from cache or provider
         # Pass start_ts and end_ts to get the right date range
         # The CachedDataProvider will fetch from database with date filters
@@ -145,18 +137,66 @@ class Backtester:
             start_ts=start_ts,
             end_ts=end_ts
         )
+        return self.run_on_bars(strategy, all_bars, timeframe, lookback=lookback)
+
+    def run_on_bars(
+        self,
+        strategy: Strategy,
+        all_bars: List[Bar],
+        timeframe: str,
+        lookback: int = 200,
+        arrays: Optional[Dict[str, Any]] = None,
+    ) -> BacktestMetrics:
+        """
+        Run backtest on bars already in memory (oldest first), e.g. to test
+        several strategies or parameter sets on one fetch.
+
+        Args:
+            strategy: Strategy instance to test
+            all_bars: Historical bars to simulate over
+            timeframe: Timeframe of the bars (used to annualize the Sharpe ratio)
+            lookback: Number of bars given to the strategy on each step
+            arrays: bar_arrays(all_bars), when the caller backtests many
+                strategies on the same bars and converts them once
+
+        Returns:
+            BacktestMetrics with performance statistics
+        """
+        # Reset state
+        self.cash = self.initial_capital
+        self.position = 0.0
+        self.avg_price = 0.0
+        self.trades = []
+        self.equity_curve = []
+        self.bars_processed = []
+        self.timeframe = timeframe  # used to annualize the Sharpe ratio correctly
 
         if not all_bars:
             return BacktestMetrics()
 
+        # Strategies that can compute every bar's exposure in one pass
+        # (GenomeStrategy.run_vectorized) skip the per-bar on_bar calls; they
+        # return what on_bar would on the same lookback windows
+        exposures = None
+        run_vectorized = getattr(strategy, "run_vectorized", None)
+        if run_vectorized is not None and NUMPY_AVAILABLE:
+            if arrays is None:
+                arrays = bar_arrays(all_bars)
+            exposures = run_vectorized(arrays["close"], arrays["high"], arrays["low"], lookback=lookback)
+            if exposures is not None:
+                exposures = exposures.tolist()
+
         # Process bars one by one
         for i, current_bar in enumerate(all_bars):
-            # Give strategy the last N bars (including current)
-            start_idx = max(0, i - lookback + 1)
-            bars_window = all_bars[start_idx:i + 1]
+            if exposures is not None:
+                target_exposure = exposures[i]
+            else:
+                # Give strategy the last N bars (including current)
+                start_idx = max(0, i - lookback + 1)
+                bars_window = all_bars[start_idx:i + 1]
 
-            # Get strategy signal
-            target_exposure = strategy.on_bar(bars_window)
+                # Get strategy signal
+                target_exposure = strategy.on_bar(bars_window)
 
             # Calculate target position
             price = current_bar.close
@@ -19,6 +19,8 @@ class Bar:
 class Strategy(Protocol):
     """Strategy contract. Stateless or stateful; returns desired position [-1..1]."""
 
+    __slots__ = ()  # lets implementations that declare __slots__ drop the instance dict
+
     def on_bar(self, bars: Iterable[Bar]) -> float:
         """Given the most recent bars (oldest→newest), return target exposure in [-1, 1].
         -1 = fully short, 0 = flat, +1 = fully long.
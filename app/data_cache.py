@@ -50,24 +50,26 @@ class CachedDataProvider(DataProvider):
 
         # Try to get from cache if available
         if coverage:
-            # Get bars from cache with date range filters
-            cached = store.get_bars(symbol, tf, start_ts=start_ts, end_ts=end_ts)
-            if len(cached) > 0:
-                # Cache hit! Convert to Bar objects
-                bars = [
-                    Bar(
-                        ts=b['ts'],
-                        open=b['open'],
-                        high=b['high'],
-                        low=b['low'],
-                        close=b['close'],
-                        volume=b['volume']
-                    )
-                    for b in cached
-                ]
-                # Apply limit if needed (take most recent bars)
-                if limit and len(bars) > limit:
-                    bars = bars[-limit:]
+            # Get bars from cache with date range filters. With a limit only the
+            # most recent `limit` bars are read; otherwise the range is streamed
+            # straight into Bar objects (no intermediate list of dicts)
+            if limit:
+                cached = store.get_last_n_bars(symbol, tf, limit, start_ts=start_ts, end_ts=end_ts)
+            else:
+                cached = store.iter_bars(symbol, tf, start_ts=start_ts, end_ts=end_ts)
+            bars = [
+                Bar(
+                    ts=b['ts'],
+                    open=b['open'],
+                    high=b['high'],
+                    low=b['low'],
+                    close=b['close'],
+                    volume=b['volume']
+                )
+                for b in cached
+            ]
+            if len(bars) > 0:
+                # Cache hit!
                 return bars
 
         # Cache miss or insufficient data - fetch from provider
@@ -0,0 +1,90 @@
+# ───────────────────────────────────────────────────────────────────────────────
+# app/ga_runner.py
+"""
+Parallel fitness evaluation for the genetic evolver.
+
+Backtesting one genome never depends on another, so a generation is farmed
+out to a process pool (master/worker): the parent fetches the bars once, each
+worker receives them a single time at start-up, and every task then only
+ships its genome and returns the backtest metrics.
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.backtest import Backtester, BacktestMetrics
+from app.core import Bar
+from app.strategies import NUMPY_AVAILABLE, bar_arrays
+from app.strategy_genome import StrategyGenome, GenomeStrategy
+
+
+def backtest_genome(
+    genome: StrategyGenome,
+    bars: List[Bar],
+    symbol: str,
+    timeframe: str,
+    initial_capital: float,
+    min_notional: float,
+    arrays: Optional[Dict[str, Any]] = None,
+) -> BacktestMetrics:
+    """
+    Backtest one genome over `bars` (the unit of work a worker runs).
+    `arrays` is bar_arrays(bars), passed when many genomes share the bars.
+    """
+    backtester = Backtester(initial_capital=initial_capital, min_notional=min_notional)
+    return backtester.run_on_bars(GenomeStrategy(genome), bars, timeframe, arrays=arrays)
+
+
+# Bars for the current pool (and their column arrays, built once for every
+# genome the worker scores), set once per worker process by _init_worker.
+_worker_bars: List[Bar] = []
+_worker_arrays: Optional[Dict[str, Any]] = None
+
+
+def _init_worker(bars: List[Bar]) -> None:
+    global _worker_bars, _worker_arrays
+    _worker_bars = bars
+    _worker_arrays = bar_arrays(bars) if NUMPY_AVAILABLE else None
+
+
+def _evaluate_in_worker(
+    genome: StrategyGenome, symbol: str, timeframe: str, initial_capital: float, min_notional: float
+) -> BacktestMetrics:
+    return backtest_genome(genome, _worker_bars, symbol, timeframe, initial_capital, min_notional, _worker_arrays)
+
+
+def evaluate_population(
+    genomes: Sequence[StrategyGenome],
+    bars: List[Bar],
+    *,
+    symbol: str,
+    timeframe: str,
+    initial_capital: float,
+    min_notional: float,
+    max_workers: Optional[int] = None,
+) -> List[Optional[BacktestMetrics]]:
+    """
+    Backtest every genome on the same bars across a process pool.
+
+    Returns metrics aligned with `genomes`; an entry is None when that genome's
+    backtest raised (the error is logged and the rest of the batch carries on).
+    `max_workers` defaults to the CPU count.
+    """
+    if not genomes:
+        return []
+    workers = min(max_workers or os.cpu_count() or 1, len(genomes))
+    results: List[Optional[BacktestMetrics]] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(bars,)) as pool:
+        futures = [
+            pool.submit(_evaluate_in_worker, genome, symbol, timeframe, initial_capital, min_notional)
+            for genome in genomes
+        ]
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"[Evolution]   Evaluation failed: {e}")
+                results.append(None)
+    return results
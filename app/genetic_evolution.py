@@ -16,11 +16,12 @@ from __future__ import annotations
 
 import time
 import random
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 
 from app.strategy_genome import StrategyGenome, GenomeStrategy
 from app.backtest import Backtester, BacktestMetrics
+from app.ga_runner import evaluate_population
 from app.data import GateAdapter
 from app.data_cache import CachedDataProvider
 from app.storage import store
@@ -190,7 +191,8 @@ class GeneticEvolver:
         population_size: int = 20,
         survivors: int = 5,
         mutation_rate: float = 0.7,
-        crossover_rate: float = 0.3
+        crossover_rate: float = 0.3,
+        workers: Optional[int] = None
     ):
         """
         Initialize genetic evolver.
@@ -200,11 +202,14 @@ class GeneticEvolver:
             survivors: Number of top performers to keep for breeding
             mutation_rate: Probability of mutation when creating offspring
             crossover_rate: Probability of crossover when creating offspring
+            workers: Processes for fitness evaluation (None = CPU count,
+                1 = evaluate genomes one by one in this process)
         """
         self.population_size = population_size
         self.survivors = survivors
         self.mutation_rate = mutation_rate
         self.crossover_rate = crossover_rate
+        self.workers = workers
 
         # Data provider
         self.data_provider = CachedDataProvider(GateAdapter(), source_name="gate")
@@ -220,6 +225,10 @@ class GeneticEvolver:
         self.generation = 0
         self.population: List[StrategyGenome] = []
 
+        # Metrics of genomes already backtested, per symbol, keyed by
+        # stable_hash(); dropped whenever that symbol's bars change
+        self._fitness_cache: Dict[str, Tuple[int, Dict[bytes, BacktestMetrics]]] = {}
+
     def initialize_population(self) -> None:
         """Create initial population from seed genomes."""
         seeds = create_seed_genomes()
@@ -268,23 +277,80 @@ class GeneticEvolver:
                 end_ts=end_ts,
             )
 
-            # Calculate fitness
-            score = calculate_fitness(metrics)
-
-            return EvolvedStrategy(
-                genome=genome,
-                symbol=symbol,
-                timeframe=self.timeframe,
-                metrics=metrics,
-                score=score,
-                generation=self.generation,
-                tested_ts=int(time.time()),
-            )
+            return self._evolved(genome, symbol, metrics)
 
         except Exception as e:
             print(f"[Evolution]   Evaluation failed: {e}")
             return None
 
+    def evaluate_population(
+        self,
+        genomes: List[StrategyGenome],
+        symbol: str
+    ) -> List[Optional[EvolvedStrategy]]:
+        """
+        Evaluate many genomes on one symbol, aligned with `genomes` (None where
+        a backtest failed). The bars are fetched once and the backtests run
+        across a process pool; with workers=1 each genome goes through
+        evaluate_genome in this process instead.
+
+        Pooled runs only submit genomes not yet scored on these exact bars
+        (survivors carried over unchanged, duplicates within the batch).
+        """
+        if self.workers == 1:
+            return [self.evaluate_genome(genome, symbol) for genome in genomes]
+
+        end_ts = int(time.time())
+        start_ts = end_ts - (self.days * 86400)
+        try:
+            bars = self.data_provider.history(
+                symbol, self.timeframe, limit=10000, start_ts=start_ts, end_ts=end_ts
+            )
+        except Exception as e:
+            print(f"[Evolution]   Evaluation failed: {e}")
+            return [None] * len(genomes)
+
+        data_key = hash(tuple((b.ts, b.high, b.low, b.close) for b in bars))
+        cached = self._fitness_cache.get(symbol)
+        if cached is None or cached[0] != data_key:
+            cached = self._fitness_cache[symbol] = (data_key, {})
+        known = cached[1]
+
+        keys = [genome.stable_hash() for genome in genomes]
+        misses: Dict[bytes, StrategyGenome] = {}
+        for key, genome in zip(keys, genomes):
+            if key not in known:
+                misses.setdefault(key, genome)
+
+        all_metrics = evaluate_population(
+            list(misses.values()),
+            bars,
+            symbol=symbol,
+            timeframe=self.timeframe,
+            initial_capital=self.initial_capital,
+            min_notional=self.min_notional,
+            max_workers=self.workers,
+        )
+        for key, metrics in zip(misses, all_metrics):
+            if metrics is not None:
+                known[key] = metrics
+        return [
+            self._evolved(genome, symbol, known[key]) if key in known else None
+            for genome, key in zip(genomes, keys)
+        ]
+
+    def _evolved(self, genome: StrategyGenome, symbol: str, metrics: BacktestMetrics) -> EvolvedStrategy:
+        """Wrap a genome's backtest metrics with its fitness score."""
+        return EvolvedStrategy(
+            genome=genome,
+            symbol=symbol,
+            timeframe=self.timeframe,
+            metrics=metrics,
+            score=calculate_fitness(metrics),
+            generation=self.generation,
+            tested_ts=int(time.time()),
+        )
+
     def evolve_generation(self) -> List[EvolvedStrategy]:
         """
         Evolve one generation across all symbols.
@@ -301,9 +367,7 @@ class GeneticEvolver:
             print(f"[Evolution] Testing {len(self.population)} genomes on {symbol}...")
 
             symbol_results = []
-            for i, genome in enumerate(self.population):
-                result = self.evaluate_genome(genome, symbol)
-
+            for i, result in enumerate(self.evaluate_population(self.population, symbol)):
                 if result:
                     symbol_results.append(result)
 
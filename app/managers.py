@@ -17,23 +17,7 @@ class StrategyManager:
 
     def step(self) -> None:
         # 1) Ensure bots exist in DB BEFORE any trades happen
-        for b in self.bots:
-            store.upsert_bot(
-                name=b.name,
-                manager=self.name,
-                symbol=b.symbol,
-                tf=b.tf,
-                strategy=type(b.strategy).__name__,
-                params=(b.strategy.to_params() if hasattr(b.strategy, "to_params") else {}),
-                allocation=b.allocation,
-                starting_allocation=b.starting_allocation,
-                cash=b.metrics.cash,
-                pos_qty=b.metrics.pos_qty,
-                avg_price=b.metrics.avg_price,
-                equity=b.metrics.equity,
-                score=b.metrics.score,
-                trades=b.metrics.trades,
-            )
+        self._persist_bots()
 
         # 2) Run bots (may record trades now that bot rows exist)
         for b in self.bots:
@@ -45,23 +29,28 @@ class StrategyManager:
         self._step_counter += 1
 
         # 4) Persist updated state
-        for b in self.bots:
-            store.upsert_bot(
-                name=b.name,
-                manager=self.name,
-                symbol=b.symbol,
-                tf=b.tf,
-                strategy=type(b.strategy).__name__,
-                params=(b.strategy.to_params() if hasattr(b.strategy, "to_params") else {}),
-                allocation=b.allocation,
-                starting_allocation=b.starting_allocation,
-                cash=b.metrics.cash,
-                pos_qty=b.metrics.pos_qty,
-                avg_price=b.metrics.avg_price,
-                equity=b.metrics.equity,
-                score=b.metrics.score,
-                trades=b.metrics.trades,
-            )
+        self._persist_bots()
+
+    def _persist_bots(self) -> None:
+        # one transaction for the whole manager instead of a commit per bot
+        with store.transaction():
+            for b in self.bots:
+                store.upsert_bot(
+                    name=b.name,
+                    manager=self.name,
+                    symbol=b.symbol,
+                    tf=b.tf,
+                    strategy=type(b.strategy).__name__,
+                    params=(b.strategy.to_params() if hasattr(b.strategy, "to_params") else {}),
+                    allocation=b.allocation,
+                    starting_allocation=b.starting_allocation,
+                    cash=b.metrics.cash,
+                    pos_qty=b.metrics.pos_qty,
+                    avg_price=b.metrics.avg_price,
+                    equity=b.metrics.equity,
+                    score=b.metrics.score,
+                    trades=b.metrics.trades,
+                )
 
     def _rebalance_within_strategy(self) -> None:
         scores = [max(0.0, b.metrics.score) for b in self.bots]
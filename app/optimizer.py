@@ -192,9 +192,9 @@ class StrategyOptimizer:
         return all_results
 
     def _save_results(self, results: List[OptimizationResult]) -> None:
-        """Save optimization results to database."""
-        for result in results:
-            store.save_optimization_result(
+        """Save optimization results to database (one transaction)."""
+        store.save_optimization_results_bulk(
+            dict(
                 strategy=result.strategy,
                 symbol=result.symbol,
                 timeframe=result.timeframe,
@@ -208,6 +208,8 @@ class StrategyOptimizer:
                 days=self.days,
                 tested_ts=result.tested_ts,
             )
+            for result in results
+        )
 
     def run_continuous(self, interval_hours: int = 24):
         """
@@ -1,15 +1,690 @@
 # app/storage.py
 from __future__ import annotations
 
+import datetime
 import hashlib
+import heapq
 import json
+import logging
 import os
+import pathlib
+import queue
 import sqlite3
 import threading
 import time
-from typing import Any, Dict, Iterable, Optional, Tuple
+import weakref
+from array import array
+from contextlib import contextmanager
+from itertools import chain, groupby, product
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        try:
+            return orjson.dumps(obj).decode()
+        except TypeError:  # e.g. non-str dict keys or ints beyond 64 bits
+            return json.dumps(obj, separators=(",", ":"))
+
+    def _loads(text: str | bytes) -> Any:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # Rows written by stdlib json may hold NaN/Infinity, which orjson rejects
+            return json.loads(text)
+except ImportError:  # orjson is optional; stdlib json produces the same compact text
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+
+    _loads = json.loads
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+    # Structured row layout for get_bars(as_numpy=True); columns read as arr["close"] etc.
+    _BAR_DTYPE = np.dtype([
+        ("ts", "i8"), ("open", "f8"), ("high", "f8"), ("low", "f8"), ("close", "f8"), ("volume", "f8"), ("source", "U16"),
+    ])
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
 
 _DB_DEFAULT = os.getenv("BOT_DB", "trading.db")
+_SQL_TRACE = bool(os.getenv("BOT_DB_TRACE"))  # log every executed statement at DEBUG (debugging only)
+_FETCH_CHUNK = 500  # rows pulled per lock acquisition when streaming results
+_READ_POOL_SIZE = min(8, os.cpu_count() or 4)  # read-only connections per Storage
+_LOOKUP_CACHE_SIZE = 1024  # entries per point-lookup cache (evolved strategies, latest bars)
+_BUSY_TIMEOUT_S = 5.0  # sqlite3 busy handler wait before raising "database is locked"
+_CHECKPOINT_INTERVAL_S = 30.0  # background WAL checkpoint period
+_WAL_TRUNCATE_FRAMES = 10_000  # escalate to a TRUNCATE checkpoint past this WAL size
+_WRITE_BATCH = 256  # queued rows that trigger an immediate flush
+_WRITE_FLUSH_S = 0.05  # max time a queued row waits to be coalesced
+_WRITE_RETRY_S = 1.0  # flusher back-off after a failed batch (locked DB, disk I/O)
+
+_INSERT_TRADE_SQL = "INSERT INTO trades(ts, bot_name, symbol, side, qty, price, fee, is_maker) VALUES(?,?,?,?,?,?,?,?)"
+_INSERT_PARAMS_SQL = "INSERT INTO param_history(ts, bot_name, strategy, params_json) VALUES(?,?,?,?)"
+
+_STAT_DECIMALS = 6  # backtest stats are shown to 1-2 decimals; bar prices are never rounded
+
+
+def _q(x: float) -> float:
+    """Round a stored backtest statistic so list responses carry short floats."""
+    return round(float(x), _STAT_DECIMALS)
+
+
+# On an upsert that takes the DO UPDATE path, cursor.lastrowid still holds the
+# previous insert's rowid; RETURNING id (SQLite 3.35+) reports the row written.
+_RETURNING_ID = " RETURNING id" if sqlite3.sqlite_version_info >= (3, 35, 0) else ""
+
+
+def _upserted_id(cur: sqlite3.Cursor) -> int:
+    """ID of the row an upsert ending in _RETURNING_ID inserted or updated."""
+    return cur.fetchone()[0] if _RETURNING_ID else cur.lastrowid
+
+
+_INSERT_BAR_SQL = (
+    "INSERT OR IGNORE INTO bars(symbol, timeframe, ts, open, high, low, close, volume, source)"
+    " VALUES(?,?,?,?,?,?,?,?,?)"
+)
+_BARS_PER_INSERT = 100  # rows per multi-VALUES insert: 900 parameters, under the 999 minimum limit
+_INSERT_BARS_CHUNK_SQL = _INSERT_BAR_SQL + ",(?,?,?,?,?,?,?,?,?)" * (_BARS_PER_INSERT - 1)
+
+_UPSERT_OPT_RESULT_SQL = """
+    INSERT INTO optimization_results(
+        strategy, symbol, timeframe, params_json, score,
+        total_return, sharpe_ratio, max_drawdown, total_trades, win_rate, days, tested_ts
+    )
+    VALUES(?,?,?,?,?,?,?,?,?,?,?,?)
+    ON CONFLICT(strategy, symbol, timeframe, params_json) DO UPDATE SET
+        score=excluded.score,
+        total_return=excluded.total_return,
+        sharpe_ratio=excluded.sharpe_ratio,
+        max_drawdown=excluded.max_drawdown,
+        total_trades=excluded.total_trades,
+        win_rate=excluded.win_rate,
+        days=excluded.days,
+        tested_ts=excluded.tested_ts
+"""
+
+
+def _opt_result_row(
+    *,
+    strategy: str,
+    symbol: str,
+    timeframe: str,
+    params: Dict[str, Any],
+    score: float,
+    total_return: float,
+    sharpe_ratio: float,
+    max_drawdown: float,
+    total_trades: int,
+    win_rate: float,
+    days: int,
+    tested_ts: int,
+) -> tuple:
+    """Bind parameters for _UPSERT_OPT_RESULT_SQL."""
+    return (
+        strategy, symbol, timeframe, _dumps(params), _q(score), _q(total_return), _q(sharpe_ratio),
+        _q(max_drawdown), int(total_trades), _q(win_rate), int(days), int(tested_ts),
+    )
+
+
+# Stablecoin-to-stablecoin conversions, excluded from P&L figures
+_STABLECOIN_PAIRS = frozenset({'USDC_USDT', 'BUSD_USDT', 'USDT_USDC', 'USDT_BUSD'})
+_SYDNEY_TZ = ZoneInfo("Australia/Sydney")
+_today_cache: tuple[int, int] = (-1, 0)  # (minute bucket, today's midnight ts)
+
+
+def _today_ts_cached() -> int:
+    """Epoch seconds of today's Sydney midnight, recomputed at most once a minute."""
+    global _today_cache
+    bucket = int(time.time() // 60)
+    if _today_cache[0] != bucket:
+        now = datetime.datetime.now(_SYDNEY_TZ)
+        today_start = datetime.datetime(now.year, now.month, now.day, 0, 0, 0, tzinfo=_SYDNEY_TZ)
+        _today_cache = (bucket, int(today_start.timestamp()))
+    return _today_cache[1]
+
+
+# Schema migrations as (version, sql). _init applies every script newer than the
+# database's user_version in one transaction, then stamps _SCHEMA_VERSION.
+_MIGRATIONS: list[tuple[int, str]] = [
+    # Version 1: core tables
+    (1, """
+        CREATE TABLE IF NOT EXISTS bots (
+            name TEXT PRIMARY KEY,
+            manager TEXT,
+            symbol TEXT NOT NULL,
+            tf TEXT NOT NULL,
+            strategy TEXT NOT NULL,
+            params_json TEXT NOT NULL,
+            allocation REAL NOT NULL,
+            cash REAL NOT NULL,
+            pos_qty REAL NOT NULL,
+            avg_price REAL NOT NULL,
+            equity REAL NOT NULL,
+            score REAL NOT NULL,
+            trades INTEGER NOT NULL,
+            updated_ts INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS trades (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts INTEGER NOT NULL,
+            bot_name TEXT NOT NULL REFERENCES bots(name) ON DELETE CASCADE,
+            symbol TEXT NOT NULL,
+            side TEXT NOT NULL,
+            qty REAL NOT NULL,
+            price REAL NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS equity_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts INTEGER NOT NULL,
+            scope TEXT NOT NULL,    -- 'bot' | 'manager' | 'portfolio'
+            name TEXT NOT NULL,
+            equity REAL NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS param_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts INTEGER NOT NULL,
+            bot_name TEXT NOT NULL,
+            strategy TEXT NOT NULL,
+            params_json TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """),
+
+    # Version 2: add bars table for historical data caching
+    (2, """
+        CREATE TABLE IF NOT EXISTS bars (
+            symbol TEXT NOT NULL,
+            timeframe TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            open REAL NOT NULL,
+            high REAL NOT NULL,
+            low REAL NOT NULL,
+            close REAL NOT NULL,
+            volume REAL NOT NULL,
+            source TEXT NOT NULL,  -- 'gate', 'coingecko', etc.
+            PRIMARY KEY (symbol, timeframe, ts)
+        );
+        CREATE INDEX IF NOT EXISTS idx_bars_symbol_tf ON bars(symbol, timeframe);
+        CREATE INDEX IF NOT EXISTS idx_bars_ts ON bars(ts);
+    """),
+
+    # Version 3: add saved_backtests table
+    (3, """
+        CREATE TABLE IF NOT EXISTS saved_backtests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            strategy TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            timeframe TEXT NOT NULL,
+            params_json TEXT NOT NULL,
+            initial_capital REAL NOT NULL,
+            min_notional REAL NOT NULL,
+            created_ts INTEGER NOT NULL
+        );
+    """),
+
+    # Version 4: add optimization_results table
+    (4, """
+        CREATE TABLE IF NOT EXISTS optimization_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            strategy TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            timeframe TEXT NOT NULL,
+            params_json TEXT NOT NULL,
+            score REAL NOT NULL,
+            total_return REAL NOT NULL,
+            sharpe_ratio REAL NOT NULL,
+            max_drawdown REAL NOT NULL,
+            total_trades INTEGER NOT NULL,
+            win_rate REAL NOT NULL,
+            tested_ts INTEGER NOT NULL,
+            UNIQUE(strategy, symbol, timeframe, params_json)
+        );
+        CREATE INDEX IF NOT EXISTS idx_opt_score ON optimization_results(score DESC);
+        CREATE INDEX IF NOT EXISTS idx_opt_strategy ON optimization_results(strategy, symbol, timeframe);
+    """),
+
+    # Version 5: add days column to saved_backtests and optimization_results
+    (5, """
+        ALTER TABLE saved_backtests ADD COLUMN days INTEGER DEFAULT 365;
+        ALTER TABLE optimization_results ADD COLUMN days INTEGER DEFAULT 365;
+    """),
+
+    # Version 6: add evolved_strategies table for genetic algorithm results
+    (6, """
+        CREATE TABLE IF NOT EXISTS evolved_strategies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            genome_json TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            timeframe TEXT NOT NULL,
+            score REAL NOT NULL,
+            total_return REAL NOT NULL,
+            sharpe_ratio REAL NOT NULL,
+            max_drawdown REAL NOT NULL,
+            total_trades INTEGER NOT NULL,
+            win_rate REAL NOT NULL,
+            generation INTEGER NOT NULL,
+            days INTEGER NOT NULL,
+            tested_ts INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_evolved_score ON evolved_strategies(score DESC);
+        CREATE INDEX IF NOT EXISTS idx_evolved_generation ON evolved_strategies(generation DESC);
+        CREATE INDEX IF NOT EXISTS idx_evolved_symbol ON evolved_strategies(symbol, timeframe);
+    """),
+
+    # Version 7: add fee tracking to trades table
+    (7, """
+        ALTER TABLE trades ADD COLUMN fee REAL DEFAULT 0.0;
+        ALTER TABLE trades ADD COLUMN is_maker INTEGER DEFAULT 0;
+        CREATE INDEX IF NOT EXISTS idx_trades_bot ON trades(bot_name, ts DESC);
+    """),
+
+    # Version 8: add starting_allocation to track fixed P&L baseline
+    (8, """
+        -- Add starting_allocation column, defaulting to current allocation
+        ALTER TABLE bots ADD COLUMN starting_allocation REAL;
+        -- Initialize starting_allocation to current allocation for existing bots
+        UPDATE bots SET starting_allocation = allocation WHERE starting_allocation IS NULL;
+    """),
+
+    # Version 9: add price_alerts table for price alert feature
+    (9, """
+        CREATE TABLE IF NOT EXISTS price_alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL,
+            target_price REAL NOT NULL,
+            condition TEXT NOT NULL,  -- 'above' or 'below'
+            email TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'active',  -- 'active', 'triggered', 'cancelled'
+            created_ts INTEGER NOT NULL,
+            triggered_ts INTEGER,
+            last_checked_price REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_alerts_status ON price_alerts(status);
+        CREATE INDEX IF NOT EXISTS idx_alerts_symbol ON price_alerts(symbol);
+    """),
+
+    # Version 10: index trades by symbol for filtered round-trip scans
+    (10, """
+        CREATE INDEX IF NOT EXISTS idx_trades_symbol_ts ON trades(symbol, ts DESC);
+    """),
+
+    # Version 11: composite indexes for the filtered list/history queries
+    # (trades by manager is indexed in v12, once manager lives on trades)
+    (11, """
+        CREATE INDEX IF NOT EXISTS idx_trades_symbol_id ON trades(symbol, id DESC);
+        CREATE INDEX IF NOT EXISTS idx_equity_scope_name_ts ON equity_history(scope, name, ts DESC);
+        CREATE INDEX IF NOT EXISTS idx_param_hist_bot_ts ON param_history(bot_name, ts DESC);
+    """),
+
+    # Version 12: denormalize the bot's manager onto trades so trade
+    # queries no longer LEFT JOIN bots per row. A trigger keeps it in sync when
+    # a bot is moved to another manager.
+    (12, """
+        ALTER TABLE trades ADD COLUMN manager TEXT;
+        UPDATE trades SET manager = (SELECT manager FROM bots WHERE bots.name = trades.bot_name);
+        CREATE INDEX IF NOT EXISTS idx_trades_manager_id ON trades(manager, id DESC);
+        CREATE TRIGGER IF NOT EXISTS trg_bots_manager_sync
+        AFTER UPDATE OF manager ON bots
+        WHEN OLD.manager IS NOT NEW.manager
+        BEGIN
+            UPDATE trades SET manager = NEW.manager WHERE bot_name = NEW.name;
+        END;
+    """),
+
+    # Version 13: (bot, symbol, id) index so round-trip / open-position
+    # scans read each group as one ordered run
+    (13, """
+        CREATE INDEX IF NOT EXISTS idx_trades_bot_sym_id ON trades(bot_name, symbol, id);
+    """),
+
+    # Version 14: fill trades.manager from an AFTER INSERT trigger so
+    # every insert path (record_trade, bulk loads, manual SQL) gets it without
+    # passing it in. Costs one PK-indexed UPDATE per inserted trade, which is
+    # cheap next to dropping the bots JOIN from every trade query.
+    (14, """
+        CREATE TRIGGER IF NOT EXISTS trg_trades_manager
+        AFTER INSERT ON trades
+        WHEN NEW.manager IS NULL
+        BEGIN
+            UPDATE trades SET manager = (SELECT manager FROM bots WHERE name = NEW.bot_name)
+            WHERE id = NEW.id;
+        END;
+    """),
+
+    # Version 15: (filter, score) indexes so the filtered list endpoints read
+    # the top N straight off the index instead of scanning and sorting. Bars
+    # range/MIN/MAX lookups are already served by the (symbol, timeframe, ts)
+    # primary key, which makes idx_bars_symbol_tf a redundant write cost.
+    (15, """
+        CREATE INDEX IF NOT EXISTS idx_opt_strat_sym_score ON optimization_results(strategy, symbol, score DESC);
+        CREATE INDEX IF NOT EXISTS idx_evo_sym_score ON evolved_strategies(symbol, score DESC);
+        DROP INDEX IF EXISTS idx_bars_symbol_tf;
+    """),
+
+    # Version 16: newest-first index for the saved strategies list and its
+    # (created_ts, id) keyset pagination
+    (16, """
+        CREATE INDEX IF NOT EXISTS idx_saved_created ON saved_backtests(created_ts DESC, id DESC);
+    """),
+
+    # Version 17: (bot, id) index so per-bot trade lists read newest-first off
+    # the index (idx_trades_bot_sym_id puts symbol between bot and id)
+    (17, """
+        CREATE INDEX IF NOT EXISTS idx_trades_bot_id ON trades(bot_name, id DESC);
+    """),
+]
+_SCHEMA_VERSION = _MIGRATIONS[-1][0]
+
+
+# params_json / genome_json stay as JSON text rather than msgpack, JSONB or
+# compressed blobs: list queries embed them into each row's json_object, so
+# one _loads call per row yields the whole dict (a binary column would need a
+# second decode per row), and JSONB needs SQLite 3.45+. Row width doesn't hurt the
+# top-N lists either, since they walk a score index and only read N rows.
+def _embedded_json(column: str) -> str:
+    """SQL expression embedding a stored JSON column when valid, else its raw text."""
+    return f"CASE WHEN json_valid({column}) THEN json({column}) ELSE {column} END"
+
+
+_SAVED_STRATEGY_JSON = (
+    ("id", "id"), ("name", "name"), ("strategy", "strategy"), ("symbol", "symbol"),
+    ("timeframe", "timeframe"), ("params", _embedded_json("params_json")),
+    ("initial_capital", "initial_capital"), ("min_notional", "min_notional"),
+    ("days", "days"), ("created_ts", "created_ts"),
+)
+_OPTIMIZATION_RESULT_JSON = (
+    ("id", "id"), ("strategy", "strategy"), ("symbol", "symbol"), ("timeframe", "timeframe"),
+    ("params", _embedded_json("params_json")), ("score", "score"), ("total_return", "total_return"),
+    ("sharpe_ratio", "sharpe_ratio"), ("max_drawdown", "max_drawdown"), ("total_trades", "total_trades"),
+    ("win_rate", "win_rate"), ("days", "days"), ("tested_ts", "tested_ts"),
+)
+_EVOLVED_STRATEGY_JSON = (
+    ("id", "id"), ("genome", _embedded_json("genome_json")), ("symbol", "symbol"), ("timeframe", "timeframe"),
+    ("score", "score"), ("total_return", "total_return"), ("sharpe_ratio", "sharpe_ratio"),
+    ("max_drawdown", "max_drawdown"), ("total_trades", "total_trades"), ("win_rate", "win_rate"),
+    ("generation", "generation"), ("days", "days"), ("tested_ts", "tested_ts"),
+)
+# REAL columns are selected beside the JSON object rather than inside it:
+# json_object renders doubles with 15 significant digits, which doesn't
+# round-trip (0.30000000000000004 would come back as 0.3).
+_REAL_KEYS = frozenset({
+    "initial_capital", "min_notional", "score", "total_return", "sharpe_ratio", "max_drawdown", "win_rate",
+})
+
+
+def _object_sql(columns: Tuple[Tuple[str, str], ...]) -> Tuple[str, Tuple[str, ...]]:
+    """
+    SELECT list for _row_dict: a json_object of `columns` with each REAL one
+    as a null placeholder (keeping the key order), followed by the REAL
+    columns themselves. Also returns those REAL keys, in select order.
+    """
+    reals = tuple(key for key, _ in columns if key in _REAL_KEYS)
+    obj = ", ".join(f"'{key}', {'NULL' if key in _REAL_KEYS else expr}" for key, expr in columns)
+    return f"json_object({obj})" + "".join(f", {expr}" for key, expr in columns if key in _REAL_KEYS), reals
+
+
+def _row_dict(row: tuple, reals: Tuple[str, ...]) -> dict:
+    """Parse a row selected with _object_sql (JSON text first, then the REALs)."""
+    out = _loads(row[0])
+    for key, value in zip(reals, row[1:]):
+        out[key] = value
+    return out
+
+
+# Every filter combination of the list queries, prebuilt so each call is a dict
+# lookup and hits sqlite3's statement cache with an identical SQL string.
+def _and_where(*conds: str) -> str:
+    return (" WHERE " + " AND ".join(conds)) if conds else ""
+
+
+_EVOLVED_STRATEGY_KEYS = frozenset(key for key, _ in _EVOLVED_STRATEGY_JSON)
+_EVOLVED_OBJECT, _EVOLVED_REALS = _object_sql(_EVOLVED_STRATEGY_JSON)
+_GET_EVOLVED_SQL = f"SELECT {_EVOLVED_OBJECT} FROM evolved_strategies WHERE id = ?"
+_GET_EVOLVED_MANY_SQL = (
+    f"SELECT id, {_EVOLVED_OBJECT} FROM evolved_strategies WHERE id IN (SELECT value FROM json_each(?))"
+)
+_LIST_OPT_SQL = {
+    (by_strategy, by_symbol): (
+        "SELECT id, strategy, symbol, timeframe, params_json, score, total_return, sharpe_ratio,"
+        " max_drawdown, total_trades, win_rate, days, tested_ts FROM optimization_results"
+        + _and_where(*(["strategy = ?"] if by_strategy else []), *(["symbol = ?"] if by_symbol else []))
+        + " ORDER BY score DESC LIMIT ?"
+    )
+    for by_strategy in (False, True) for by_symbol in (False, True)
+}
+_LIST_EVOLVED_SQL = {
+    (by_symbol, by_score): (
+        "SELECT id, genome_json, symbol, timeframe, score, total_return, sharpe_ratio, max_drawdown,"
+        " total_trades, win_rate, generation, days, tested_ts FROM evolved_strategies"
+        + _and_where(*(["symbol = ?"] if by_symbol else []), *(["score >= ?"] if by_score else []))
+        + " ORDER BY score DESC LIMIT ?"
+    )
+    for by_symbol in (False, True) for by_score in (False, True)
+}
+_GET_BARS_SQL = {
+    (by_start, by_end, limited): (
+        "SELECT ts, open, high, low, close, volume, source FROM bars"
+        + _and_where("symbol = ?", "timeframe = ?",
+                     *(["ts >= ?"] if by_start else []), *(["ts <= ?"] if by_end else []))
+        + " ORDER BY ts ASC"
+        + (" LIMIT ?" if limited else "")
+    )
+    for by_start in (False, True) for by_end in (False, True) for limited in (False, True)
+}
+# Newest `LIMIT` bars walked backwards off the (symbol, timeframe, ts) key;
+# get_last_n_bars reverses them in Python rather than re-sorting in a temp b-tree.
+_LAST_BARS_SQL = {
+    (by_start, by_end): (
+        "SELECT ts, open, high, low, close, volume, source FROM bars"
+        + _and_where("symbol = ?", "timeframe = ?",
+                     *(["ts >= ?"] if by_start else []), *(["ts <= ?"] if by_end else []))
+        + " ORDER BY ts DESC LIMIT ?"
+    )
+    for by_start in (False, True) for by_end in (False, True)
+}
+# Newest ts and the number of bars from the oldest cached one onwards: bars are
+# insert-only, so both matching means a cached tail is still what disk holds.
+_BARS_TAIL_SQL = (
+    "SELECT MAX(ts), COUNT(*) FROM bars WHERE symbol = ? AND timeframe = ? AND ts >= ?"
+)
+_BAR_FIELDS = ("ts", "open", "high", "low", "close", "volume", "source")
+_LIST_SAVED_SQL = {
+    (paged, limited): (
+        "SELECT * FROM saved_backtests"
+        + _and_where(*(["(created_ts, id) < (?, ?)"] if paged else []))
+        + " ORDER BY created_ts DESC, id DESC"
+        + (" LIMIT ?" if limited else "")
+    )
+    for paged in (False, True) for limited in (False, True)
+}
+_TRADE_RUNS_ORDER = " ORDER BY t.bot_name, t.symbol, t.id"  # one run per (bot, symbol), idx_trades_bot_sym_id
+
+
+def _flagged_where(conds: Tuple[str, ...], flags: Tuple[bool, ...]) -> str:
+    """WHERE clause with the conditions whose flag is set, in order."""
+    return _and_where(*(c for c, on in zip(conds, flags) if on))
+
+
+_LIST_TRADES_SQL = {
+    (*flags, limited): (
+        "SELECT t.id, t.ts, t.bot_name AS bot, t.manager, t.symbol, t.side, t.qty, t.price,"
+        " COALESCE(t.fee, 0.0) AS fee, t.is_maker FROM trades t"
+        + _flagged_where(("t.id > ?", "t.bot_name = ?", "t.symbol = ?", "t.manager = ?"), flags)
+        + " ORDER BY t.id DESC"
+        + (" LIMIT ?" if limited else "")
+    )
+    for flags in product((False, True), repeat=4) for limited in (False, True)
+}
+_FEE_STATS_SQL = {
+    flags: (
+        "SELECT COUNT(*), SUM(t.fee),"
+        " SUM(CASE WHEN t.is_maker = 1 THEN t.fee ELSE 0 END),"
+        " SUM(CASE WHEN t.is_maker = 0 THEN t.fee ELSE 0 END),"
+        " SUM(CASE WHEN t.is_maker = 1 THEN 1 ELSE 0 END),"
+        " SUM(CASE WHEN t.is_maker = 0 THEN 1 ELSE 0 END),"
+        " SUM(t.qty * t.price) FROM trades t"
+        + _flagged_where(("t.bot_name = ?", "t.manager = ?"), flags)
+    )
+    for flags in product((False, True), repeat=2)
+}
+_ROUNDTRIP_TRADES_SQL = {
+    flags: (
+        "SELECT t.id, t.ts, t.bot_name, t.manager, t.symbol, t.side, t.qty, t.price FROM trades t"
+        + _flagged_where(("t.bot_name = ?", "t.symbol = ?", "t.manager = ?",
+                          "t.symbol NOT IN (SELECT value FROM json_each(?))"), flags)
+        + _TRADE_RUNS_ORDER
+    )
+    for flags in product((False, True), repeat=4)
+}
+_POSITION_FILTERS = ("t.bot_name = ?", "t.symbol = ?", "t.manager = ?")
+# Only (bot, symbol) groups whose net quantity isn't ~0 are shipped to Python.
+# The cut-off is half list_open_positions' 1e-12 flat test, so float rounding
+# differences between SQL's SUM and the Python running sum can't drop a group.
+_POSITION_TRADES_SQL = {
+    flags: (
+        "SELECT t.ts, t.bot_name, t.manager, t.symbol, t.side, t.qty, t.price FROM trades t"
+        + _flagged_where(_POSITION_FILTERS + (
+            "(t.bot_name, t.symbol) IN (SELECT t.bot_name, t.symbol FROM trades t"
+            + _flagged_where(_POSITION_FILTERS, flags)
+            + " GROUP BY t.bot_name, t.symbol"
+            " HAVING ABS(SUM(CASE WHEN UPPER(t.side) = 'BUY' THEN t.qty ELSE -t.qty END)) >= 5e-13)",
+        ), (*flags, True))
+        + _TRADE_RUNS_ORDER
+    )
+    for flags in product((False, True), repeat=3)
+}
+_LIST_ALERTS_SQL = {
+    (by_status, by_email): (
+        "SELECT id, symbol, target_price, condition, email, status, created_ts, triggered_ts,"
+        " last_checked_price FROM price_alerts"
+        + _and_where(*(["status = ?"] if by_status else []), *(["email = ?"] if by_email else []))
+        + " ORDER BY created_ts DESC"
+    )
+    for by_status in (False, True) for by_email in (False, True)
+}
+
+
+def _bars_query(
+    symbol: str, timeframe: str, start_ts: int | None, end_ts: int | None, limit: int | None
+) -> Tuple[str, list]:
+    """Pick the _GET_BARS_SQL variant and its bind parameters."""
+    args: list = [symbol, timeframe]
+    if start_ts is not None:
+        args.append(int(start_ts))
+    if end_ts is not None:
+        args.append(int(end_ts))
+    if limit is not None:
+        args.append(int(limit))
+    return _GET_BARS_SQL[(start_ts is not None, end_ts is not None, limit is not None)], args
+
+
+def _cache_put(cache: Dict[Any, Any], key: Any, value: Any) -> None:
+    """Insert into a bounded lookup cache, evicting the oldest entry when full."""
+    if len(cache) >= _LOOKUP_CACHE_SIZE:
+        cache.pop(next(iter(cache)), None)
+    cache[key] = value
+
+
+def _trace_sql(statement: str) -> None:
+    # sqlite3 trace callback (BOT_DB_TRACE=1): one line per statement, bound
+    # values expanded, so the SQL a method actually runs can be EXPLAINed.
+    logger.debug("SQL [%s] %s", threading.current_thread().name, " ".join(statement.split()))
+
+
+def _take_queued(q: "queue.Queue[tuple]") -> list[tuple]:
+    items = []
+    while True:
+        try:
+            items.append(q.get_nowait())
+        except queue.Empty:
+            return items
+
+
+def _requeue(q: "queue.Queue[tuple]", items: list[tuple]) -> None:
+    """Put taken items back at the head of the queue, ahead of anything queued since."""
+    with q.mutex:
+        q.queue.extendleft(reversed(items))
+
+
+def _drain_writes(
+    q: "queue.Queue[tuple]", conn: sqlite3.Connection, lock: threading.Lock, flush_lock: threading.Lock
+) -> None:
+    """
+    Write every queued (sql, row) in one transaction, preserving enqueue order.
+    Consecutive rows for the same statement go through a single executemany.
+    A row that violates a constraint is logged and dropped; any other error
+    (locked database, disk I/O) rolls the batch back, puts it back on the
+    queue in order and is raised.
+    """
+    with flush_lock:
+        items = _take_queued(q)
+        if not items:
+            return
+        with lock:
+            try:
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    for sql, run in groupby(items, key=itemgetter(0)):
+                        conn.executemany(sql, [row for _, row in run])
+                except sqlite3.IntegrityError:
+                    # One bad row (e.g. unknown bot) must not drop the rest of the batch.
+                    conn.execute("ROLLBACK")
+                    conn.execute("BEGIN IMMEDIATE")
+                    for sql, row in items:
+                        try:
+                            conn.execute(sql, row)
+                        except sqlite3.IntegrityError as e:
+                            logger.error("Dropped queued row %r (%s): %s", row, sql.split("(", 1)[0], e)
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                _requeue(q, items)
+                raise
+
+
+def _write_flusher(
+    q: "queue.Queue[tuple]", conn: sqlite3.Connection, lock: threading.Lock,
+    flush_lock: threading.Lock, wake: threading.Event, stop: threading.Event,
+) -> None:
+    while not stop.is_set():
+        wake.wait()
+        wake.clear()
+        if q.qsize() < _WRITE_BATCH:
+            stop.wait(_WRITE_FLUSH_S)  # coalescing window
+        try:
+            _drain_writes(q, conn, lock, flush_lock)
+        except sqlite3.Error:
+            logger.exception("Queued write batch failed; retrying in %.0fs", _WRITE_RETRY_S)
+            stop.wait(_WRITE_RETRY_S)
+            wake.set()
+
+
+def _stop_write_flusher(
+    q: "queue.Queue[tuple]", conn: sqlite3.Connection, lock: threading.Lock,
+    flush_lock: threading.Lock, wake: threading.Event, stop: threading.Event,
+) -> None:
+    stop.set()
+    wake.set()
+    try:
+        _drain_writes(q, conn, lock, flush_lock)
+    except sqlite3.Error:
+        logger.exception("Could not write %d queued rows at shutdown", q.qsize())
 
 
 class Storage:
@@ -18,241 +693,236 @@ class Storage:
     def __init__(self, db_path: str | os.PathLike[str] = _DB_DEFAULT) -> None:
         self.path = str(db_path)
         self._lock = threading.Lock()
-        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._tx_owner: int | None = None  # thread id running the open _write()/transaction()
+        # Autocommit mode: writes open their own BEGIN IMMEDIATE via _write() so the
+        # write lock is taken up front instead of upgrading a deferred transaction.
+        self._conn = sqlite3.connect(
+            self.path, timeout=_BUSY_TIMEOUT_S, check_same_thread=False, isolation_level=None, cached_statements=256
+        )
+        if _SQL_TRACE:
+            self._conn.set_trace_callback(_trace_sql)
         self._conn.execute("PRAGMA journal_mode=WAL")
         self._conn.execute("PRAGMA foreign_keys=ON")
+        # WAL only needs fsync at checkpoints, so NORMAL is durable against app crashes;
+        # a bigger page cache, in-memory temp tables and mmap reads cut I/O on bulk work.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        self._conn.execute("PRAGMA cache_size=-64000")  # ~64 MB
+        self._conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+        # Checkpoints run from a background thread instead of inline on whichever
+        # write happens to cross the autocheckpoint threshold.
+        self._conn.execute("PRAGMA wal_autocheckpoint=0")
         self._init()
 
-    def _init(self) -> None:
-        cur = self._conn.cursor()
-        cur.execute("PRAGMA user_version")
-        ver = int(cur.fetchone()[0])
-        if ver < 1:
-            cur.executescript(
-                """
-                BEGIN;
-                CREATE TABLE IF NOT EXISTS bots (
-                    name TEXT PRIMARY KEY,
-                    manager TEXT,
-                    symbol TEXT NOT NULL,
-                    tf TEXT NOT NULL,
-                    strategy TEXT NOT NULL,
-                    params_json TEXT NOT NULL,
-                    allocation REAL NOT NULL,
-                    cash REAL NOT NULL,
-                    pos_qty REAL NOT NULL,
-                    avg_price REAL NOT NULL,
-                    equity REAL NOT NULL,
-                    score REAL NOT NULL,
-                    trades INTEGER NOT NULL,
-                    updated_ts INTEGER NOT NULL
-                );
-
-                CREATE TABLE IF NOT EXISTS trades (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    ts INTEGER NOT NULL,
-                    bot_name TEXT NOT NULL REFERENCES bots(name) ON DELETE CASCADE,
-                    symbol TEXT NOT NULL,
-                    side TEXT NOT NULL,
-                    qty REAL NOT NULL,
-                    price REAL NOT NULL
-                );
-
-                CREATE TABLE IF NOT EXISTS equity_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    ts INTEGER NOT NULL,
-                    scope TEXT NOT NULL,    -- 'bot' | 'manager' | 'portfolio'
-                    name TEXT NOT NULL,
-                    equity REAL NOT NULL
-                );
-
-                CREATE TABLE IF NOT EXISTS param_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    ts INTEGER NOT NULL,
-                    bot_name TEXT NOT NULL,
-                    strategy TEXT NOT NULL,
-                    params_json TEXT NOT NULL
-                );
-
-                CREATE TABLE IF NOT EXISTS settings (
-                    key TEXT PRIMARY KEY,
-                    value TEXT NOT NULL
-                );
-                PRAGMA user_version = 1;
-                COMMIT;
-                """
-            )
-            self._conn.commit()
+        # Readers: a pool of read-only connections so SELECTs don't queue behind
+        # writes on self._lock. An in-memory database can't be shared across
+        # connections, so it reads through the writer instead.
+        self._readers: "queue.SimpleQueue[sqlite3.Connection] | None" = None
+        if self.path != ":memory:" and not self.path.startswith("file:"):
+            self._readers = queue.SimpleQueue()
+            ro_uri = pathlib.Path(self.path).absolute().as_uri() + "?mode=ro"
+            for _ in range(_READ_POOL_SIZE):
+                reader = sqlite3.connect(
+                    ro_uri, uri=True, timeout=_BUSY_TIMEOUT_S, check_same_thread=False,
+                    isolation_level=None, cached_statements=256,
+                )
+                if _SQL_TRACE:
+                    reader.set_trace_callback(_trace_sql)
+                reader.execute("PRAGMA mmap_size=268435456")
+                self._readers.put(reader)
+
+        # Evolved strategies are insert-only, so their cached rows never go
+        # stale. Bar coverage is not cached: other worker processes store bars too.
+        self._evolved_cache: Dict[int, tuple] = {}
+        # Latest-bars rows per (symbol, timeframe) as (bars version, n, rows). The
+        # version is bumped by store_bars, so an entry filled from a read that
+        # raced a write is never served once that write lands; bars stored by
+        # other processes are caught by a MAX(ts) check before each hit.
+        self._bars_version: Dict[Tuple[str, str], int] = {}
+        self._last_bars_cache: Dict[Tuple[str, str], Tuple[int, int, list]] = {}
+
+        threading.Thread(
+            target=Storage._checkpoint_loop, args=(weakref.ref(self),), daemon=True
+        ).start()
+
+        # record_trade/record_params enqueue (sql, row); a flusher thread writes
+        # queued rows in batches. The flusher only holds the queue/connection, and
+        # the finalizer (which also runs at interpreter exit) stops it and writes
+        # anything still queued.
+        self._write_queue: "queue.Queue[tuple]" = queue.Queue()
+        self._flush_lock = threading.Lock()
+        self._write_wake = threading.Event()
+        flusher_args = (self._write_queue, self._conn, self._lock, self._flush_lock,
+                        self._write_wake, threading.Event())
+        threading.Thread(target=_write_flusher, args=flusher_args, daemon=True).start()
+        weakref.finalize(self, _stop_write_flusher, *flusher_args)
+
+    def _json_rows(
+        self, columns: Tuple[Tuple[str, str], ...], from_sql: str, args: Iterable[Any] = (), json_key: str | None = None
+    ) -> list[dict]:
+        """
+        Materialize rows as dicts built inside SQLite: each row of `from_sql`
+        comes back as a json_object(...) that the JSON parser turns into a dict
+        in C, with REAL columns selected beside it (see _object_sql) so they
+        keep full precision. `columns` maps output keys to SQL expressions
+        over `from_sql`'s columns. `json_key` names a column that holds stored
+        JSON text; it is embedded as-is when valid, and any legacy value
+        SQLite rejects (e.g. NaN) is left as text and parsed here.
+        """
+        select, reals = _object_sql(columns)
+        with self._read() as conn:
+            rows = conn.execute(f"SELECT {select} FROM ({from_sql})", tuple(args)).fetchall()
+        out = [_row_dict(row, reals) for row in rows]
+        if json_key is not None:
+            for d in out:
+                if isinstance(d[json_key], str):
+                    d[json_key] = _loads(d[json_key])
+        return out
 
-        # Migrate to version 2: add bars table for historical data caching
-        if ver < 2:
-            cur.executescript(
-                """
-                BEGIN;
-                CREATE TABLE IF NOT EXISTS bars (
-                    symbol TEXT NOT NULL,
-                    timeframe TEXT NOT NULL,
-                    ts INTEGER NOT NULL,
-                    open REAL NOT NULL,
-                    high REAL NOT NULL,
-                    low REAL NOT NULL,
-                    close REAL NOT NULL,
-                    volume REAL NOT NULL,
-                    source TEXT NOT NULL,  -- 'gate', 'coingecko', etc.
-                    PRIMARY KEY (symbol, timeframe, ts)
-                );
-                CREATE INDEX IF NOT EXISTS idx_bars_symbol_tf ON bars(symbol, timeframe);
-                CREATE INDEX IF NOT EXISTS idx_bars_ts ON bars(ts);
-                PRAGMA user_version = 2;
-                COMMIT;
-                """
-            )
-            self._conn.commit()
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        """Check out a read-only connection; WAL lets it run alongside the writer."""
+        if self._readers is None:
+            if self._tx_owner == threading.get_ident():
+                # inside this thread's _write()/transaction(), which holds the lock
+                yield self._conn
+                return
+            with self._lock:
+                yield self._conn
+            return
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
 
-        # Migrate to version 3: add saved_backtests table
-        if ver < 3:
-            cur.executescript(
-                """
-                BEGIN;
-                CREATE TABLE IF NOT EXISTS saved_backtests (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE,
-                    strategy TEXT NOT NULL,
-                    symbol TEXT NOT NULL,
-                    timeframe TEXT NOT NULL,
-                    params_json TEXT NOT NULL,
-                    initial_capital REAL NOT NULL,
-                    min_notional REAL NOT NULL,
-                    created_ts INTEGER NOT NULL
-                );
-                PRAGMA user_version = 3;
-                COMMIT;
-                """
-            )
-            self._conn.commit()
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """
+        Hold the lock and run the body in a BEGIN IMMEDIATE transaction. Nested
+        on the thread that already has one open, it runs in a savepoint of the
+        outer transaction, so a failing write method that the caller catches
+        leaves none of its statements behind.
+        """
+        if self._tx_owner == threading.get_ident():
+            self._conn.execute("SAVEPOINT nested_write")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK TO nested_write")
+                raise
+            finally:
+                self._conn.execute("RELEASE nested_write")
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._tx_owner = threading.get_ident()
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+            finally:
+                self._tx_owner = None
 
-        # Migrate to version 4: add optimization_results table
-        if ver < 4:
-            cur.executescript(
-                """
-                BEGIN;
-                CREATE TABLE IF NOT EXISTS optimization_results (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    strategy TEXT NOT NULL,
-                    symbol TEXT NOT NULL,
-                    timeframe TEXT NOT NULL,
-                    params_json TEXT NOT NULL,
-                    score REAL NOT NULL,
-                    total_return REAL NOT NULL,
-                    sharpe_ratio REAL NOT NULL,
-                    max_drawdown REAL NOT NULL,
-                    total_trades INTEGER NOT NULL,
-                    win_rate REAL NOT NULL,
-                    tested_ts INTEGER NOT NULL,
-                    UNIQUE(strategy, symbol, timeframe, params_json)
-                );
-                CREATE INDEX IF NOT EXISTS idx_opt_score ON optimization_results(score DESC);
-                CREATE INDEX IF NOT EXISTS idx_opt_strategy ON optimization_results(strategy, symbol, timeframe);
-                PRAGMA user_version = 4;
-                COMMIT;
-                """
-            )
-            self._conn.commit()
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Group several writes (upsert_bot, record_params, store_bars, ...) into one
+        BEGIN IMMEDIATE/COMMIT instead of one commit each; any exception rolls
+        the whole block back. Queued trades/params flushed inside the block
+        (e.g. by record_trades_bulk) join it too. Reads go through the reader
+        pool, so they don't see the block's writes until it commits (an
+        in-memory database has no pool and reads inside the block). Nested
+        in the same thread, the inner block runs as a savepoint of the outer
+        one, like a nested _write().
+        """
+        if self._tx_owner == threading.get_ident():
+            with self._write():
+                yield
+            return
+        with self._flush_lock, self._write():
+            yield
+
+    @staticmethod
+    def _checkpoint_loop(ref: "weakref.ref[Storage]") -> None:
+        # Holds only a weak reference so a discarded Storage can still be collected.
+        while True:
+            time.sleep(_CHECKPOINT_INTERVAL_S)
+            storage = ref()
+            if storage is None:
+                return
+            try:
+                storage.checkpoint()
+            except sqlite3.Error:
+                pass
+            del storage
+
+    def checkpoint(self, truncate: bool = False) -> None:
+        """
+        Copy committed WAL frames back into the database file without blocking
+        readers; truncate the WAL if it has grown past _WAL_TRUNCATE_FRAMES.
+        truncate=True always resets the WAL to zero bytes (e.g. before copying
+        the database file for a backup); queued trades/params are written first.
+        Inside this thread's transaction() there is nothing committed to copy
+        yet: a passive checkpoint is skipped and truncate=True raises.
+        """
+        if self._tx_owner == threading.get_ident():
+            if truncate:
+                raise RuntimeError("checkpoint(truncate=True) can't run inside transaction()")
+            return
+        if truncate:
+            self.flush_trades()
+        with self._lock:
+            _busy, log_frames, _done = self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+            if truncate or log_frames > _WAL_TRUNCATE_FRAMES:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
 
-        # Migrate to version 5: add days column to saved_backtests and optimization_results
-        if ver < 5:
-            cur.executescript(
-                """
-                BEGIN;
-                ALTER TABLE saved_backtests ADD COLUMN days INTEGER DEFAULT 365;
-                ALTER TABLE optimization_results ADD COLUMN days INTEGER DEFAULT 365;
-                PRAGMA user_version = 5;
-                COMMIT;
-                """
-            )
-            self._conn.commit()
+    def _iter_rows(self, sql: str, args: Iterable[Any] = ()) -> Iterator[tuple]:
+        """
+        Yield result rows in chunks of _FETCH_CHUNK from a pooled reader, which
+        stays checked out until the generator is exhausted or closed.
+        """
+        with self._read() as conn:
+            cur = conn.execute(sql, tuple(args))
+            cur.arraysize = _FETCH_CHUNK
+            while rows := cur.fetchmany():
+                yield from rows
 
-        # Migrate to version 6: add evolved_strategies table for genetic algorithm results
-        if ver < 6:
-            cur.executescript(
-                """
-                BEGIN;
-                CREATE TABLE IF NOT EXISTS evolved_strategies (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    genome_json TEXT NOT NULL,
-                    symbol TEXT NOT NULL,
-                    timeframe TEXT NOT NULL,
-                    score REAL NOT NULL,
-                    total_return REAL NOT NULL,
-                    sharpe_ratio REAL NOT NULL,
-                    max_drawdown REAL NOT NULL,
-                    total_trades INTEGER NOT NULL,
-                    win_rate REAL NOT NULL,
-                    generation INTEGER NOT NULL,
-                    days INTEGER NOT NULL,
-                    tested_ts INTEGER NOT NULL
-                );
-                CREATE INDEX IF NOT EXISTS idx_evolved_score ON evolved_strategies(score DESC);
-                CREATE INDEX IF NOT EXISTS idx_evolved_generation ON evolved_strategies(generation DESC);
-                CREATE INDEX IF NOT EXISTS idx_evolved_symbol ON evolved_strategies(symbol, timeframe);
-                PRAGMA user_version = 6;
-                COMMIT;
-                """
-            )
-            self._conn.commit()
+    def _iter_dicts(self, sql: str, args: Iterable[Any] = ()) -> Iterator[Dict[str, Any]]:
+        """
+        Like _iter_rows, but yield each row as a dict keyed by its (aliased)
+        column names. Names are read once from cursor.description and zipped
+        onto each tuple, which is cheaper than going through sqlite3.Row.
+        """
+        with self._read() as conn:
+            cur = conn.execute(sql, tuple(args))
+            cols = tuple(d[0] for d in cur.description)
+            cur.arraysize = _FETCH_CHUNK
+            while rows := cur.fetchmany():
+                for r in rows:
+                    yield dict(zip(cols, r))
 
-        # Migrate to version 7: add fee tracking to trades table
-        if ver < 7:
-            cur.executescript(
-                """
-                BEGIN;
-                ALTER TABLE trades ADD COLUMN fee REAL DEFAULT 0.0;
-                ALTER TABLE trades ADD COLUMN is_maker INTEGER DEFAULT 0;
-                CREATE INDEX IF NOT EXISTS idx_trades_bot ON trades(bot_name, ts DESC);
-                PRAGMA user_version = 7;
-                COMMIT;
-                """
-            )
-            self._conn.commit()
+    def _init(self) -> None:
+        ver = int(self._conn.execute("PRAGMA user_version").fetchone()[0])
+        if ver >= _SCHEMA_VERSION:
+            return  # hot start: schema is current, nothing else to check
 
-        # Migrate to version 8: add starting_allocation to track fixed P&L baseline
-        if ver < 8:
-            cur.executescript(
-                """
-                BEGIN;
-                -- Add starting_allocation column, defaulting to current allocation
-                ALTER TABLE bots ADD COLUMN starting_allocation REAL;
-                -- Initialize starting_allocation to current allocation for existing bots
-                UPDATE bots SET starting_allocation = allocation WHERE starting_allocation IS NULL;
-                PRAGMA user_version = 8;
-                COMMIT;
-                """
+        pending = "\n".join(sql for v, sql in _MIGRATIONS if v > ver)
+        try:
+            self._conn.executescript(
+                f"BEGIN;\n{pending}\nPRAGMA user_version = {_SCHEMA_VERSION};\nCOMMIT;"
             )
-            self._conn.commit()
+        except sqlite3.Error:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            raise
 
-        # Migrate to version 9: add price_alerts table for price alert feature
-        if ver < 9:
-            cur.executescript(
-                """
-                BEGIN;
-                CREATE TABLE IF NOT EXISTS price_alerts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    symbol TEXT NOT NULL,
-                    target_price REAL NOT NULL,
-                    condition TEXT NOT NULL,  -- 'above' or 'below'
-                    email TEXT NOT NULL,
-                    status TEXT NOT NULL DEFAULT 'active',  -- 'active', 'triggered', 'cancelled'
-                    created_ts INTEGER NOT NULL,
-                    triggered_ts INTEGER,
-                    last_checked_price REAL
-                );
-                CREATE INDEX IF NOT EXISTS idx_alerts_status ON price_alerts(status);
-                CREATE INDEX IF NOT EXISTS idx_alerts_symbol ON price_alerts(symbol);
-                PRAGMA user_version = 9;
-                COMMIT;
-                """
-            )
-            self._conn.commit()
+        # New indexes are only used well once the planner has statistics for them,
+        # so refresh them whenever a migration ran.
+        self._conn.execute("ANALYZE")
 
     # ── Trades ────────────────────────────────────────────────────────────────
     def record_trade(
@@ -266,13 +936,47 @@ class Storage:
         fee: float = 0.0,
         is_maker: bool = False
     ) -> None:
+        """
+        Queue a trade for the background flusher, which writes batches in a single
+        transaction. Trade queries flush first, so reads always see it.
+        """
         ts = int(ts or time.time())
-        with self._lock:
-            self._conn.execute(
-                "INSERT INTO trades(ts, bot_name, symbol, side, qty, price, fee, is_maker) VALUES(?,?,?,?,?,?,?,?)",
-                (ts, bot_name, symbol, side, float(qty), float(price), float(fee), int(is_maker)),
-            )
-            self._conn.commit()
+        self._write_queue.put(
+            (_INSERT_TRADE_SQL, (ts, bot_name, symbol, side, float(qty), float(price), float(fee), int(is_maker)))
+        )
+        self._write_wake.set()
+
+    def record_trades_bulk(self, rows: Iterable[Tuple[int, str, str, str, float, float, float, bool]]) -> None:
+        """
+        Insert many trades synchronously in one transaction.
+        rows = [(ts, bot_name, symbol, side, qty, price, fee, is_maker), ...]
+        """
+        batch = [
+            (int(ts), bot_name, symbol, side, float(qty), float(price), float(fee), int(is_maker))
+            for ts, bot_name, symbol, side, qty, price, fee, is_maker in rows
+        ]
+        self.flush_trades()  # keep queued trades ahead of this batch
+        with self._write():
+            self._conn.executemany(_INSERT_TRADE_SQL, batch)
+
+    def flush_trades(self) -> None:
+        """
+        Write all queued trades and params now (e.g. before shutdown or a trade
+        query). Raises sqlite3.Error, leaving the rows queued, if the batch
+        can't be written.
+        """
+        if self._tx_owner == threading.get_ident():
+            # Inside transaction(), which already holds both locks: write into it.
+            # If that fails the block rolls back, so the rows go back on the queue.
+            items = _take_queued(self._write_queue)
+            try:
+                for sql, run in groupby(items, key=itemgetter(0)):
+                    self._conn.executemany(sql, [row for _, row in run])
+            except sqlite3.Error:
+                _requeue(self._write_queue, items)
+                raise
+            return
+        _drain_writes(self._write_queue, self._conn, self._lock, self._flush_lock)
 
     # ── Bot state ─────────────────────────────────────────────────────────────
     def upsert_bot(
@@ -294,10 +998,10 @@ class Storage:
         trades: int,
     ) -> None:
         now = int(time.time())
-        pjson = json.dumps(params, separators=(",", ":"))
+        pjson = _dumps(params)
         # If starting_allocation not provided, use current allocation (for new bots)
         start_alloc = starting_allocation if starting_allocation is not None else allocation
-        with self._lock:
+        with self._write():
             self._conn.execute(
                 """
                 INSERT INTO bots(name, manager, symbol, tf, strategy, params_json, allocation, starting_allocation, cash, pos_qty, avg_price, equity, score, trades, updated_ts)
@@ -320,14 +1024,11 @@ class Storage:
                 """,
                 (name, manager, symbol, tf, strategy, pjson, allocation, start_alloc, cash, pos_qty, avg_price, equity, score, trades, now),
             )
-            self._conn.commit()
 
     def load_bots(self) -> Dict[str, Dict[str, Any]]:
-        with self._lock:
-            cur = self._conn.execute(
-                "SELECT name, manager, symbol, tf, strategy, params_json, allocation, starting_allocation, cash, pos_qty, avg_price, equity, score, trades FROM bots"
-            )
-            rows = cur.fetchall()
+        rows = self._iter_rows(
+            "SELECT name, manager, symbol, tf, strategy, params_json, allocation, starting_allocation, cash, pos_qty, avg_price, equity, score, trades FROM bots"
+        )
         out: Dict[str, Dict[str, Any]] = {}
         for r in rows:
             name, manager, symbol, tf, strategy, pjson, allocation, starting_allocation, cash, pos_qty, avg_price, equity, score, trades = r
@@ -336,50 +1037,75 @@ class Storage:
                 "symbol": symbol,
                 "tf": tf,
                 "strategy": strategy,
-                "params": json.loads(pjson),
-                "allocation": float(allocation),
-                "starting_allocation": float(starting_allocation) if starting_allocation is not None else float(allocation),
-                "cash": float(cash),
-                "pos_qty": float(pos_qty),
-                "avg_price": float(avg_price),
-                "equity": float(equity),
-                "score": float(score),
-                "trades": int(trades),
+                "params": _loads(pjson),
+                "allocation": allocation,
+                "starting_allocation": starting_allocation if starting_allocation is not None else allocation,
+                "cash": cash,
+                "pos_qty": pos_qty,
+                "avg_price": avg_price,
+                "equity": equity,
+                "score": score,
+                "trades": trades,
             }
         return out
 
     # ── Params ────────────────────────────────────────────────────────────────
     def record_params(self, bot_name: str, strategy: str, params: Dict[str, Any]) -> None:
-        with self._lock:
+        """Queue a param_history row; it is written with the next trade flush."""
+        self._write_queue.put((_INSERT_PARAMS_SQL, (int(time.time()), bot_name, strategy, _dumps(params))))
+        self._write_wake.set()
+
+    def record_params_bulk(self, entries: Iterable[Tuple[str, str, Dict[str, Any]]], ts: Optional[int] = None) -> None:
+        """
+        Insert many param_history rows at once. entries = [(bot_name, strategy, params), ...]
+        The batch is shipped as one JSON array and expanded by json_each in SQLite.
+        """
+        ts = int(ts or time.time())
+        payload = _dumps(
+            [{"ts": ts, "bot": bot, "strategy": strategy, "params": params} for bot, strategy, params in entries]
+        )
+        self.flush_trades()  # keep queued record_params rows ahead of this batch
+        with self._write():
             self._conn.execute(
-                "INSERT INTO param_history(ts, bot_name, strategy, params_json) VALUES(?,?,?,?)",
-                (int(time.time()), bot_name, strategy, json.dumps(params, separators=(",", ":"))),
+                """
+                INSERT INTO param_history(ts, bot_name, strategy, params_json)
+                SELECT json_extract(value, '$.ts'), json_extract(value, '$.bot'),
+                       json_extract(value, '$.strategy'), json(json_extract(value, '$.params'))
+                FROM json_each(?)
+                """,
+                (payload,),
             )
-            self._conn.commit()
 
     # ── Equity snapshots ──────────────────────────────────────────────────────
     def snapshot_equity(
         self, *, portfolio_name: str, managers: Iterable[Tuple[str, float]], bots: Iterable[Tuple[str, float]]
     ) -> None:
         ts = int(time.time())
-        with self._lock:
-            total = 0.0
-            for name, eq in managers:
-                total += float(eq)
-                self._conn.execute(
-                    "INSERT INTO equity_history(ts, scope, name, equity) VALUES(?,?,?,?)",
-                    (ts, "manager", name, float(eq)),
-                )
-            for name, eq in bots:
-                self._conn.execute(
-                    "INSERT INTO equity_history(ts, scope, name, equity) VALUES(?,?,?,?)",
-                    (ts, "bot", name, float(eq)),
-                )
+        rows = [(ts, "manager", name, float(eq)) for name, eq in managers]
+        total = sum(r[3] for r in rows)
+        rows.extend((ts, "bot", name, float(eq)) for name, eq in bots)
+        rows.append((ts, "portfolio", portfolio_name, total))
+        with self._write():
+            self._conn.executemany(
+                "INSERT INTO equity_history(ts, scope, name, equity) VALUES(?,?,?,?)", rows
+            )
+
+    def snapshot_equity_bulk(self, rows: Iterable[Tuple[int, str, str, float]]) -> None:
+        """
+        Insert many equity_history rows at once. rows = [(ts, scope, name, equity), ...]
+        Used for backfills; the batch is expanded by json_each in a single statement.
+        """
+        payload = _dumps([[int(ts), scope, name, float(eq)] for ts, scope, name, eq in rows])
+        with self._write():
             self._conn.execute(
-                "INSERT INTO equity_history(ts, scope, name, equity) VALUES(?,?,?,?)",
-                (ts, "portfolio", portfolio_name, total),
+                """
+                INSERT INTO equity_history(ts, scope, name, equity)
+                SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]'),
+                       json_extract(value, '$[2]'), json_extract(value, '$[3]')
+                FROM json_each(?)
+                """,
+                (payload,),
             )
-            self._conn.commit()
 
     # ── Trade queries ──────────────────────────────────────────────────────────
     def list_trades(
@@ -394,49 +1120,34 @@ class Storage:
         """
         Return recent trades (most recent first) with optional filters.
         """
-        sql = [
-            "SELECT t.id, t.ts, t.bot_name, b.manager, t.symbol, t.side, t.qty, t.price, t.fee, t.is_maker",
-            "FROM trades t LEFT JOIN bots b ON b.name = t.bot_name",
-            "WHERE 1=1",
-        ]
-        args: list = []
+        return list(self.list_trades_iter(
+            limit=limit, since_id=since_id, bot_name=bot_name, symbol=symbol, manager=manager,
+        ))
 
-        if since_id is not None:
-            sql.append("AND t.id > ?")
-            args.append(int(since_id))
-        if bot_name:
-            sql.append("AND t.bot_name = ?")
-            args.append(bot_name)
-        if symbol:
-            sql.append("AND t.symbol = ?")
-            args.append(symbol)
-        if manager:
-            sql.append("AND b.manager = ?")
-            args.append(manager)
-
-        sql.append("ORDER BY t.id DESC")
-        sql.append("LIMIT ?")
-        args.append(int(limit))
-
-        with self._lock:
-            cur = self._conn.execute(" ".join(sql), args)
-            rows = cur.fetchall()
+    def list_trades_iter(
+            self,
+            *,
+            limit: int | None = None,
+            since_id: int | None = None,
+            bot_name: str | None = None,
+            symbol: str | None = None,
+            manager: str | None = None,
+    ) -> Iterator[dict]:
+        """
+        Stream trades (most recent first) as dicts, fetching rows in chunks.
+        """
+        self.flush_trades()
+        flags = (since_id is not None, bool(bot_name), bool(symbol), bool(manager))
+        args: list = [v for v, on in zip((since_id and int(since_id), bot_name, symbol, manager), flags) if on]
+        if limit is not None:
+            args.append(int(limit))
+        sql = _LIST_TRADES_SQL[(*flags, limit is not None)]
 
-        return [
-            {
-                "id": r[0],
-                "ts": int(r[1]),
-                "bot": r[2],
-                "manager": r[3],
-                "symbol": r[4],
-                "side": r[5],
-                "qty": float(r[6]),
-                "price": float(r[7]),
-                "fee": float(r[8] or 0),
-                "is_maker": bool(r[9]),
-            }
-            for r in rows
-        ]
+        # Columns are aliased to the output keys; only is_maker needs converting
+        # from SQLite's 0/1.
+        for d in self._iter_dicts(sql, args):
+            d["is_maker"] = bool(d["is_maker"])
+            yield d
 
     def fee_statistics(
             self,
@@ -447,30 +1158,11 @@ class Storage:
         """
         Return fee statistics including total fees, maker/taker breakdown.
         """
-        sql_base = [
-            "SELECT",
-            "  COUNT(*) as total_trades,",
-            "  SUM(t.fee) as total_fees,",
-            "  SUM(CASE WHEN t.is_maker = 1 THEN t.fee ELSE 0 END) as maker_fees,",
-            "  SUM(CASE WHEN t.is_maker = 0 THEN t.fee ELSE 0 END) as taker_fees,",
-            "  SUM(CASE WHEN t.is_maker = 1 THEN 1 ELSE 0 END) as maker_count,",
-            "  SUM(CASE WHEN t.is_maker = 0 THEN 1 ELSE 0 END) as taker_count,",
-            "  SUM(t.qty * t.price) as total_volume",
-            "FROM trades t LEFT JOIN bots b ON b.name = t.bot_name",
-            "WHERE 1=1",
-        ]
-        args: list = []
-
-        if bot_name:
-            sql_base.append("AND t.bot_name = ?")
-            args.append(bot_name)
-        if manager:
-            sql_base.append("AND b.manager = ?")
-            args.append(manager)
-
-        with self._lock:
-            cur = self._conn.execute(" ".join(sql_base), args)
-            row = cur.fetchone()
+        self.flush_trades()
+        flags = (bool(bot_name), bool(manager))
+        args = [v for v, on in zip((bot_name, manager), flags) if on]
+        with self._read() as conn:
+            row = conn.execute(_FEE_STATS_SQL[flags], args).fetchone()
 
         if not row or row[0] == 0:
             return {
@@ -485,13 +1177,14 @@ class Storage:
                 "fee_percentage": 0.0,
             }
 
-        total_trades = int(row[0])
-        total_fees = float(row[1] or 0)
-        maker_fees = float(row[2] or 0)
-        taker_fees = float(row[3] or 0)
-        maker_count = int(row[4] or 0)
-        taker_count = int(row[5] or 0)
-        total_volume = float(row[6] or 0)
+        # SUM() is NULL over no matching rows, otherwise already int/float.
+        total_trades = row[0]
+        total_fees = row[1] or 0.0
+        maker_fees = row[2] or 0.0
+        taker_fees = row[3] or 0.0
+        maker_count = row[4] or 0
+        taker_count = row[5] or 0
+        total_volume = row[6] or 0.0
 
         return {
             "total_trades": total_trades,
@@ -506,78 +1199,41 @@ class Storage:
         }
 
     def trade_counts(self) -> dict[str, int]:
-        with self._lock:
-            cur = self._conn.execute(
+        self.flush_trades()
+        with self._read() as conn:
+            cur = conn.execute(
                 "SELECT bot_name, COUNT(*) FROM trades GROUP BY bot_name"
             )
             rows = cur.fetchall()
-        return {name: int(cnt) for (name, cnt) in rows}
+        return dict(rows)
 
     def calculate_realized_pnl(self, exclude_stablecoin_pairs: bool = True) -> float:
         """
         Calculate total realized P&L from closed round-trips.
         Optionally excludes stablecoin-to-stablecoin conversions (USDC_USDT, etc.).
         """
-        # Define stablecoin pairs to exclude
-        stablecoin_pairs = {'USDC_USDT', 'BUSD_USDT', 'USDT_USDC', 'USDT_BUSD'}
-
-        # Get all round-trips (no limit)
-        roundtrips = self.list_roundtrips(limit=100000)
-
-        total_pnl = 0.0
-        for rt in roundtrips:
-            symbol = rt.get('symbol', '')
-
-            # Skip stablecoin conversions if requested
-            if exclude_stablecoin_pairs and symbol in stablecoin_pairs:
-                continue
-
-            # Add the P&L from this round-trip
-            pnl = rt.get('pnl', 0.0)
-            total_pnl += pnl
+        # Get all round-trips (no limit); stablecoin pairs are filtered in SQL
+        roundtrips = self.list_roundtrips(
+            limit=100000,
+            exclude_symbols=_STABLECOIN_PAIRS if exclude_stablecoin_pairs else None,
+        )
 
-        return total_pnl
+        return sum(rt.get('pnl', 0.0) for rt in roundtrips)
 
     def calculate_todays_pnl(self) -> float:
         """
         Calculate total P&L from trades executed today (Sydney timezone midnight to now).
         Uses round-trips closed today, excluding stablecoin conversions.
         """
-        import datetime
-        from zoneinfo import ZoneInfo
-
-        # Calculate today's start timestamp (Sydney timezone midnight)
-        sydney_tz = ZoneInfo("Australia/Sydney")
-        now = datetime.datetime.now(sydney_tz)
-        today_start = datetime.datetime(now.year, now.month, now.day, 0, 0, 0, tzinfo=sydney_tz)
-        today_ts = int(today_start.timestamp())
-
-        # Define stablecoin pairs to exclude
-        stablecoin_pairs = {'USDC_USDT', 'BUSD_USDT', 'USDT_USDC', 'USDT_BUSD'}
-
-        # Get all round-trips
-        roundtrips = self.list_roundtrips(limit=100000)
-
-        todays_pnl = 0.0
-        for rt in roundtrips:
-            # Check if round-trip closed today. list_roundtrips emits the close
-            # timestamp under 'close_ts'; the old 'exit_ts' key never matched, so
-            # today's P&L was permanently 0.
-            close_ts = rt.get('close_ts', 0)
-            if close_ts < today_ts:
-                continue
-
-            symbol = rt.get('symbol', '')
-
-            # Skip stablecoin conversions
-            if symbol in stablecoin_pairs:
-                continue
-
-            # Add the P&L from this round-trip
-            pnl = rt.get('pnl', 0.0)
-            todays_pnl += pnl
+        # Round-trips closed today (by 'close_ts'), stablecoin conversions
+        # excluded in SQL rather than after the FIFO pass.
+        roundtrips = self.list_roundtrips(
+            limit=100000,
+            exclude_symbols=_STABLECOIN_PAIRS,
+            min_exit_ts=_today_ts_cached(),
+        )
 
-        return todays_pnl
+        return sum(rt.get('pnl', 0.0) for rt in roundtrips)
 
     # ── Round-trips (buy→sell or sell→buy cycles) ─────────────────────────────
     def list_roundtrips(
@@ -588,69 +1244,88 @@ class Storage:
             symbol: str | None = None,
             manager: str | None = None,
             fee_bps: float = 0.0,  # optional fees per side in basis points
+            exclude_symbols: set[str] | frozenset[str] | None = None,
+            min_exit_ts: int | None = None,
     ) -> list[dict]:
         """
         Build closed round-trips from raw trades using FIFO lot matching.
         Works even if the bot never goes net-flat (partial closes produce round-trips).
         Returns most-recent-first up to `limit`.
-        """
-        sql = [
-            "SELECT t.id, t.ts, t.bot_name, b.manager, t.symbol, t.side, t.qty, t.price",
-            "FROM trades t LEFT JOIN bots b ON b.name = t.bot_name",
-            "WHERE 1=1",
-        ]
-        args: list = []
-        if bot_name:
-            sql.append("AND t.bot_name = ?");
-            args.append(bot_name)
-        if symbol:
-            sql.append("AND t.symbol = ?");
-            args.append(symbol)
-        if manager:
-            sql.append("AND b.manager = ?");
-            args.append(manager)
-        sql.append("ORDER BY t.id ASC")
-
-        with self._lock:
-            rows = self._conn.execute(" ".join(sql), args).fetchall()
-
-        from collections import deque
-        groups: dict[tuple[str, str], list[tuple]] = {}
-        for r in rows:
-            _, ts, bot, mng, sym, side, qty, price = r
-            groups.setdefault((bot, sym), []).append(
-                (int(ts), bot, mng, sym, side.upper(), float(qty), float(price))
-            )
 
+        `exclude_symbols` drops those symbols' trades in SQL; `min_exit_ts` keeps
+        only round-trips closed at or after that timestamp.
+        """
+        self.flush_trades()
+        flags = (bool(bot_name), bool(symbol), bool(manager), bool(exclude_symbols))
+        args: list = [v for v, on in zip((bot_name, symbol, manager), flags) if on]
+        if exclude_symbols:
+            args.append(_dumps(sorted(exclude_symbols)))
+        with self._read() as conn:
+            rows = conn.execute(_ROUNDTRIP_TRADES_SQL[flags], args).fetchall()
+
+        mgr_tbl: dict[str | None, int] = {}
+        mgr_names: list[str | None] = []
         out: list[dict] = []
         fee = float(fee_bps) / 10000.0
 
-        for (bot, sym), trades in groups.items():
-            # FIFO lots: each lot = (open_ts, side, remaining_qty, vwap_price, manager_at_open)
-            lots: deque[tuple[int, str, float, float, str]] = deque()
+        for (bot, sym), run in groupby(rows, key=lambda r: (r[2], r[4])):
+            # Structure-of-arrays for the run: parallel typed columns instead of a
+            # tuple per trade. Managers are interned so the matcher only carries ints.
+            g_ts, g_side, g_qty, g_px, g_mgr = array("q"), array("b"), array("d"), array("d"), array("l")
+            for _, ts, _bot, mng, _sym, side, qty, price in run:
+                mi = mgr_tbl.get(mng)
+                if mi is None:
+                    mi = mgr_tbl[mng] = len(mgr_names)
+                    mgr_names.append(mng)
+                g_ts.append(ts)
+                g_side.append(1 if side.upper() == "BUY" else 0)
+                g_qty.append(qty)
+                g_px.append(price)
+                g_mgr.append(mi)
+
+            if min_exit_ts is not None and max(g_ts) < min_exit_ts:
+                # A group whose latest trade predates the cutoff cannot close a
+                # round-trip after it, so skip its FIFO pass entirely.
+                continue
 
-            for ts, _bot, manager, _sym, side, qty, price in trades:
+            # FIFO lots live in preallocated columns walked by head/tail indices.
+            # All open lots share one direction, and each trade adds at most one
+            # lot, so the group length bounds the buffer.
+            n = len(g_ts)
+            lot_ts = array("q", [0]) * n
+            lot_qty = array("d", [0.0]) * n
+            lot_px = array("d", [0.0]) * n
+            lot_mgr = array("l", [0]) * n
+            lot_side = -1  # direction of the open lots (1=BUY, 0=SELL), -1 when flat
+            head = tail = 0
+
+            for i in range(n):
+                qty = g_qty[i]
                 if qty <= 0:
                     continue
+                ts = g_ts[i]
+                side = g_side[i]
                 # apply fee as slippage on price (optional)
-                px_eff = price * (1 + (fee if side == "BUY" else -fee))
+                px_eff = g_px[i] * (1 + (fee if side else -fee))
 
-                if not lots or lots[0][1] == side:
+                if head == tail or lot_side == side:
                     # same-direction → add a lot (average handled by matching process)
-                    lots.append((ts, side, qty, px_eff, manager))
+                    lot_ts[tail], lot_qty[tail], lot_px[tail], lot_mgr[tail] = ts, qty, px_eff, g_mgr[i]
+                    lot_side = side
+                    tail += 1
                     continue
 
                 # opposite side → match FIFO
                 remain = qty
-                while remain > 1e-12 and lots and lots[0][1] != side:
-                    open_ts, open_side, lot_qty, lot_px, open_mgr = lots[0]
-                    take = min(lot_qty, remain)
-                    lot_qty -= take
+                side_label = "LONG" if lot_side == 1 else "SHORT"
+                while remain > 1e-12 and head < tail:
+                    open_ts = lot_ts[head]
+                    entry_vwap = lot_px[head]
+                    take = min(lot_qty[head], remain)
+                    lot_qty[head] -= take
                     remain -= take
 
                     # Round-trip from this partial match
-                    side_label = "LONG" if open_side == "BUY" else "SHORT"
-                    entry_vwap = lot_px
                     exit_vwap = px_eff
                     if side_label == "LONG":
                         pnl = (exit_vwap - entry_vwap) * take
@@ -661,7 +1336,7 @@ class Storage:
 
                     out.append({
                         "bot": bot,
-                        "manager": open_mgr,
+                        "manager": mgr_names[lot_mgr[head]],
                         "symbol": sym,
                         "side": side_label,
                         "qty": take,
@@ -669,22 +1344,25 @@ class Storage:
                         "exit_price": exit_vwap,
                         "pnl": pnl,
                         "pnl_pct": pnl_pct,
-                        "open_ts": int(open_ts),
-                        "close_ts": int(ts),
-                        "duration_s": int(ts - open_ts),
+                        "open_ts": open_ts,
+                        "close_ts": ts,
+                        "duration_s": ts - open_ts,
                     })
 
-                    if lot_qty <= 1e-12:
-                        lots.popleft()
-                    else:
-                        lots[0] = (open_ts, open_side, lot_qty, lot_px, open_mgr)
+                    if lot_qty[head] <= 1e-12:
+                        head += 1
 
                 # any remaining qty becomes a new lot (could be a flip)
                 if remain > 1e-12:
-                    lots.append((ts, side, remain, px_eff, manager))
+                    lot_ts[tail], lot_qty[tail], lot_px[tail], lot_mgr[tail] = ts, remain, px_eff, g_mgr[i]
+                    lot_side = side
+                    tail += 1
 
-        out.sort(key=lambda d: d["close_ts"], reverse=True)
-        return out[:limit]
+        if min_exit_ts is not None:
+            out = [d for d in out if d["close_ts"] >= min_exit_ts]
+
+        # Top-`limit` selection is O(n log limit) and matches sort-then-slice order.
+        return heapq.nlargest(limit, out, key=itemgetter("close_ts"))
 
     # ── Open positions (unclosed cycles) ───────────────────────────────────────
     # inside class Storage
@@ -697,45 +1375,42 @@ class Storage:
             manager: str | None = None,
             mark_prices: dict[str, float] | None = None,  # optional symbol->price for unrealized PnL
     ) -> list[dict]:
-        sql = [
-            "SELECT t.ts, t.bot_name, b.manager, t.symbol, t.side, t.qty, t.price",
-            "FROM trades t LEFT JOIN bots b ON b.name = t.bot_name",
-            "WHERE 1=1",
-        ]
-        args: list = []
-        if bot_name: sql += ["AND t.bot_name = ?"]; args += [bot_name]
-        if symbol:   sql += ["AND t.symbol = ?"];   args += [symbol]
-        if manager:  sql += ["AND b.manager = ?"];  args += [manager]
-        sql += ["ORDER BY t.id ASC"]
+        self.flush_trades()
+        flags = (bool(bot_name), bool(symbol), bool(manager))
+        args = [v for v, on in zip((bot_name, symbol, manager), flags) if on]
+        with self._read() as conn:
+            # filters bind twice: once outside, once in the non-flat subquery
+            rows = conn.execute(_POSITION_TRADES_SQL[flags], args + args).fetchall()
 
-        with self._lock:
-            rows = self._conn.execute(" ".join(sql), args).fetchall()
 
         # net position + avg cost per (bot, symbol)
-        by_key: dict[tuple[str, str], dict] = {}
-        for ts, bot, mng, sym, side, qty, price in rows:
-            key = (bot, sym)
-            d = by_key.setdefault(key, {"bot": bot, "manager": mng, "symbol": sym,
-                                        "net_qty": 0.0, "entry_qty": 0.0, "entry_cost": 0.0,
-                                        "open_ts": int(ts)})
-            signed = float(qty) if side.upper() == "BUY" else -float(qty)
-            prev = d["net_qty"]
-            d["net_qty"] = prev + signed
-            if prev == 0.0:
-                d["open_ts"] = int(ts)
-            # maintain avg entry on adds; reduce on partial closes
-            if (d["net_qty"] >= 0 and side.upper() == "BUY") or (d["net_qty"] < 0 and side.upper() == "SELL"):
-                d["entry_qty"] += float(qty)
-                d["entry_cost"] += float(qty) * float(price)
-            else:
-                reduce_q = min(abs(signed), d["entry_qty"])
-                if reduce_q > 0:
-                    avg = d["entry_cost"] / d["entry_qty"] if d["entry_qty"] else 0.0
-                    d["entry_qty"] -= reduce_q
-                    d["entry_cost"] -= reduce_q * avg
+        positions: list[dict] = []
+        for (bot, sym), run in groupby(rows, key=lambda r: (r[1], r[3])):
+            d = None
+            for ts, _bot, mng, _sym, side, qty, price in run:
+                if d is None:
+                    d = {"bot": bot, "manager": mng, "symbol": sym,
+                         "net_qty": 0.0, "entry_qty": 0.0, "entry_cost": 0.0,
+                         "open_ts": ts}
+                signed = qty if side.upper() == "BUY" else -qty
+                prev = d["net_qty"]
+                d["net_qty"] = prev + signed
+                if prev == 0.0:
+                    d["open_ts"] = ts
+                # maintain avg entry on adds; reduce on partial closes
+                if (d["net_qty"] >= 0 and side.upper() == "BUY") or (d["net_qty"] < 0 and side.upper() == "SELL"):
+                    d["entry_qty"] += qty
+                    d["entry_cost"] += qty * price
+                else:
+                    reduce_q = min(abs(signed), d["entry_qty"])
+                    if reduce_q > 0:
+                        avg = d["entry_cost"] / d["entry_qty"] if d["entry_qty"] else 0.0
+                        d["entry_qty"] -= reduce_q
+                        d["entry_cost"] -= reduce_q * avg
+            positions.append(d)
 
         out: list[dict] = []
-        for d in by_key.values():
+        for d in positions:
             if abs(d["net_qty"]) < 1e-12:
                 continue
             side_lbl = "LONG" if d["net_qty"] > 0 else "SHORT"
@@ -756,10 +1431,10 @@ class Storage:
     def save_strategy(self, *, name: str, strategy: str, symbol: str, timeframe: str,
                       params: Dict[str, Any], initial_capital: float, min_notional: float, days: int = 365) -> int:
         """Save a strategy configuration. Returns the saved ID."""
-        params_json = json.dumps(params, separators=(",", ":"))
+        params_json = _dumps(params)
         now = int(time.time())
 
-        with self._lock:
+        with self._write():
             cur = self._conn.execute(
                 """
                 INSERT INTO saved_backtests(name, strategy, symbol, timeframe, params_json, initial_capital, min_notional, days, created_ts)
@@ -773,40 +1448,28 @@ class Storage:
                     min_notional=excluded.min_notional,
                     days=excluded.days,
                     created_ts=excluded.created_ts
-                """,
+                """ + _RETURNING_ID,
                 (name, strategy, symbol, timeframe, params_json, float(initial_capital), float(min_notional), int(days), now)
             )
-            self._conn.commit()
-            return cur.lastrowid
+            return _upserted_id(cur)
 
-    def list_saved_strategies(self) -> list[dict]:
-        """List all saved strategy configurations."""
-        with self._lock:
-            cur = self._conn.execute(
-                "SELECT id, name, strategy, symbol, timeframe, params_json, initial_capital, min_notional, days, created_ts FROM saved_backtests ORDER BY created_ts DESC"
-            )
-            rows = cur.fetchall()
-
-        return [
-            {
-                "id": int(r[0]),
-                "name": r[1],
-                "strategy": r[2],
-                "symbol": r[3],
-                "timeframe": r[4],
-                "params": json.loads(r[5]),
-                "initial_capital": float(r[6]),
-                "min_notional": float(r[7]),
-                "days": int(r[8]),
-                "created_ts": int(r[9]),
-            }
-            for r in rows
-        ]
+    def list_saved_strategies(self, before: Tuple[int, int] | None = None, limit: int | None = None) -> list[dict]:
+        """
+        List saved strategy configurations, newest first. For keyset paging,
+        pass the (created_ts, id) of the last row seen as `before`.
+        """
+        args: list = []
+        if before is not None:
+            args.extend((int(before[0]), int(before[1])))
+        if limit is not None:
+            args.append(int(limit))
+        sql = _LIST_SAVED_SQL[(before is not None, limit is not None)]
+        return self._json_rows(_SAVED_STRATEGY_JSON, sql, args, json_key="params")
 
     def get_saved_strategy(self, strategy_id: int) -> dict | None:
         """Get a specific saved strategy configuration by ID."""
-        with self._lock:
-            cur = self._conn.execute(
+        with self._read() as conn:
+            cur = conn.execute(
                 "SELECT id, name, strategy, symbol, timeframe, params_json, initial_capital, min_notional, days, created_ts FROM saved_backtests WHERE id = ?",
                 (int(strategy_id),)
             )
@@ -816,23 +1479,22 @@ class Storage:
             return None
 
         return {
-            "id": int(row[0]),
+            "id": row[0],
             "name": row[1],
             "strategy": row[2],
             "symbol": row[3],
             "timeframe": row[4],
-            "params": json.loads(row[5]),
-            "initial_capital": float(row[6]),
-            "min_notional": float(row[7]),
-            "days": int(row[8]),
-            "created_ts": int(row[9]),
+            "params": _loads(row[5]),
+            "initial_capital": row[6],
+            "min_notional": row[7],
+            "days": row[8],
+            "created_ts": row[9],
         }
 
     def delete_saved_strategy(self, strategy_id: int) -> bool:
         """Delete a saved strategy configuration. Returns True if deleted."""
-        with self._lock:
+        with self._write():
             cur = self._conn.execute("DELETE FROM saved_backtests WHERE id = ?", (int(strategy_id),))
-            self._conn.commit()
             return cur.rowcount > 0
 
     # Backward compatibility aliases (deprecated, use save_strategy/list_saved_strategies instead)
@@ -859,43 +1521,25 @@ class Storage:
         tested_ts: int,
     ) -> int:
         """Save an optimization result. Updates if same config exists."""
-        params_json = json.dumps(params, separators=(",", ":"))
-
-        with self._lock:
+        with self._write():
             cur = self._conn.execute(
-                """
-                INSERT INTO optimization_results(
-                    strategy, symbol, timeframe, params_json, score,
-                    total_return, sharpe_ratio, max_drawdown, total_trades, win_rate, days, tested_ts
-                )
-                VALUES(?,?,?,?,?,?,?,?,?,?,?,?)
-                ON CONFLICT(strategy, symbol, timeframe, params_json) DO UPDATE SET
-                    score=excluded.score,
-                    total_return=excluded.total_return,
-                    sharpe_ratio=excluded.sharpe_ratio,
-                    max_drawdown=excluded.max_drawdown,
-                    total_trades=excluded.total_trades,
-                    win_rate=excluded.win_rate,
-                    days=excluded.days,
-                    tested_ts=excluded.tested_ts
-                """,
-                (
-                    strategy,
-                    symbol,
-                    timeframe,
-                    params_json,
-                    float(score),
-                    float(total_return),
-                    float(sharpe_ratio),
-                    float(max_drawdown),
-                    int(total_trades),
-                    float(win_rate),
-                    int(days),
-                    int(tested_ts),
+                _UPSERT_OPT_RESULT_SQL + _RETURNING_ID,
+                _opt_result_row(
+                    strategy=strategy, symbol=symbol, timeframe=timeframe, params=params, score=score,
+                    total_return=total_return, sharpe_ratio=sharpe_ratio, max_drawdown=max_drawdown,
+                    total_trades=total_trades, win_rate=win_rate, days=days, tested_ts=tested_ts,
                 ),
             )
-            self._conn.commit()
-            return cur.lastrowid
+            return _upserted_id(cur)
+
+    def save_optimization_results_bulk(self, results: Iterable[Dict[str, Any]]) -> None:
+        """
+        Save many optimization results in one transaction. Each dict takes the
+        keyword arguments of save_optimization_result.
+        """
+        batch = [_opt_result_row(**r) for r in results]
+        with self._write():
+            self._conn.executemany(_UPSERT_OPT_RESULT_SQL, batch)
 
     def list_optimization_results(
         self, strategy: str = None, symbol: str = None, limit: int = 100
@@ -904,49 +1548,15 @@ class Storage:
         List optimization results, optionally filtered by strategy/symbol.
         Returns top results sorted by score (best first).
         """
-        sql = [
-            """
-            SELECT id, strategy, symbol, timeframe, params_json, score,
-                   total_return, sharpe_ratio, max_drawdown, total_trades, win_rate, days, tested_ts
-            FROM optimization_results
-            WHERE 1=1
-            """
-        ]
-        args = []
-
+        args: list = []
         if strategy:
-            sql.append("AND strategy = ?")
             args.append(strategy)
-
         if symbol:
-            sql.append("AND symbol = ?")
             args.append(symbol)
-
-        sql.append("ORDER BY score DESC LIMIT ?")
         args.append(int(limit))
 
-        with self._lock:
-            cur = self._conn.execute(" ".join(sql), args)
-            rows = cur.fetchall()
-
-        return [
-            {
-                "id": int(r[0]),
-                "strategy": r[1],
-                "symbol": r[2],
-                "timeframe": r[3],
-                "params": json.loads(r[4]),
-                "score": float(r[5]),
-                "total_return": float(r[6]),
-                "sharpe_ratio": float(r[7]),
-                "max_drawdown": float(r[8]),
-                "total_trades": int(r[9]),
-                "win_rate": float(r[10]),
-                "days": int(r[11]),
-                "tested_ts": int(r[12]),
-            }
-            for r in rows
-        ]
+        sql = _LIST_OPT_SQL[(bool(strategy), bool(symbol))]
+        return self._json_rows(_OPTIMIZATION_RESULT_JSON, sql, args, json_key="params")
 
     # ── Evolved strategies (genetic algorithm) ─────────────────────────────────
     def save_evolved_strategy(
@@ -966,9 +1576,9 @@ class Storage:
         tested_ts: int,
     ) -> int:
         """Save an evolved strategy from genetic algorithm."""
-        genome_json = json.dumps(genome, separators=(",", ":"))
+        genome_json = _dumps(genome)
 
-        with self._lock:
+        with self._write():
             cur = self._conn.execute(
                 """
                 INSERT INTO evolved_strategies(
@@ -982,71 +1592,45 @@ class Storage:
                     genome_json,
                     symbol,
                     timeframe,
-                    float(score),
-                    float(total_return),
-                    float(sharpe_ratio),
-                    float(max_drawdown),
+                    _q(score),
+                    _q(total_return),
+                    _q(sharpe_ratio),
+                    _q(max_drawdown),
                     int(total_trades),
-                    float(win_rate),
+                    _q(win_rate),
                     int(generation),
                     int(days),
                     int(tested_ts),
                 ),
             )
-            self._conn.commit()
             return cur.lastrowid
 
     def list_evolved_strategies(
-        self, symbol: str = None, min_score: float = None, limit: int = 100
+        self, symbol: str = None, min_score: float = None, limit: int = 100, columns: Tuple[str, ...] | None = None
     ) -> list[dict]:
         """
         List evolved strategies, optionally filtered by symbol and minimum score.
         Returns top results sorted by score (best first).
+        `columns` limits each dict to those keys; the genome is only parsed
+        when "genome" is among them.
         """
-        sql = [
-            """
-            SELECT id, genome_json, symbol, timeframe, score,
-                   total_return, sharpe_ratio, max_drawdown, total_trades, win_rate,
-                   generation, days, tested_ts
-            FROM evolved_strategies
-            WHERE 1=1
-            """
-        ]
-        args = []
+        fields = _EVOLVED_STRATEGY_JSON
+        if columns is not None:
+            unknown = set(columns) - _EVOLVED_STRATEGY_KEYS
+            if unknown:
+                raise ValueError(f"Unknown evolved strategy columns: {sorted(unknown)}")
+            fields = tuple(f for f in _EVOLVED_STRATEGY_JSON if f[0] in columns)
 
+        args: list = []
         if symbol:
-            sql.append("AND symbol = ?")
             args.append(symbol)
-
         if min_score is not None:
-            sql.append("AND score >= ?")
             args.append(float(min_score))
-
-        sql.append("ORDER BY score DESC LIMIT ?")
         args.append(int(limit))
 
-        with self._lock:
-            cur = self._conn.execute(" ".join(sql), args)
-            rows = cur.fetchall()
-
-        return [
-            {
-                "id": int(r[0]),
-                "genome": json.loads(r[1]),
-                "symbol": r[2],
-                "timeframe": r[3],
-                "score": float(r[4]),
-                "total_return": float(r[5]),
-                "sharpe_ratio": float(r[6]),
-                "max_drawdown": float(r[7]),
-                "total_trades": int(r[8]),
-                "win_rate": float(r[9]),
-                "generation": int(r[10]),
-                "days": int(r[11]),
-                "tested_ts": int(r[12]),
-            }
-            for r in rows
-        ]
+        sql = _LIST_EVOLVED_SQL[(bool(symbol), min_score is not None)]
+        json_key = "genome" if any(key == "genome" for key, _ in fields) else None
+        return self._json_rows(fields, sql, args, json_key=json_key)
 
     def get_top_evolved_strategies_for_portfolio(self, num_strategies: int = 5, min_score: float = 0.0) -> list[dict]:
         """
@@ -1092,37 +1676,39 @@ class Storage:
 
     def get_evolved_strategy(self, strategy_id: int) -> dict | None:
         """Get a specific evolved strategy by ID."""
-        with self._lock:
-            cur = self._conn.execute(
-                """
-                SELECT id, genome_json, symbol, timeframe, score,
-                       total_return, sharpe_ratio, max_drawdown, total_trades, win_rate,
-                       generation, days, tested_ts
-                FROM evolved_strategies
-                WHERE id = ?
-                """,
-                (int(strategy_id),)
-            )
-            row = cur.fetchone()
-
-        if not row:
-            return None
-
-        return {
-            "id": int(row[0]),
-            "genome": json.loads(row[1]),
-            "symbol": row[2],
-            "timeframe": row[3],
-            "score": float(row[4]),
-            "total_return": float(row[5]),
-            "sharpe_ratio": float(row[6]),
-            "max_drawdown": float(row[7]),
-            "total_trades": int(row[8]),
-            "win_rate": float(row[9]),
-            "generation": int(row[10]),
-            "days": int(row[11]),
-            "tested_ts": int(row[12]),
-        }
+        strategy_id = int(strategy_id)
+        row = self._evolved_cache.get(strategy_id)
+        if row is None:
+            with self._read() as conn:
+                row = conn.execute(_GET_EVOLVED_SQL, (strategy_id,)).fetchone()
+            if row is None:
+                return None
+            _cache_put(self._evolved_cache, strategy_id, row)
+        return self._evolved_from_row(row)
+
+    def get_evolved_strategies_by_ids(self, strategy_ids: Iterable[int]) -> Dict[int, dict]:
+        """
+        Get several evolved strategies at once, keyed by ID (missing IDs are
+        left out). Cache misses are fetched in one statement via json_each.
+        """
+        ids = [int(i) for i in strategy_ids]
+        found = {i: self._evolved_cache[i] for i in ids if i in self._evolved_cache}
+        missing = [i for i in ids if i not in found]
+        if missing:
+            with self._read() as conn:
+                rows = conn.execute(_GET_EVOLVED_MANY_SQL, (_dumps(missing),)).fetchall()
+            for sid, *row in rows:
+                _cache_put(self._evolved_cache, sid, tuple(row))
+                found[sid] = tuple(row)
+        return {i: self._evolved_from_row(found[i]) for i in ids if i in found}
+
+    @staticmethod
+    def _evolved_from_row(row: tuple) -> dict:
+        # Cached as the raw row (JSON text) so every caller gets its own genome to mutate.
+        out = _row_dict(row, _EVOLVED_REALS)
+        if isinstance(out["genome"], str):
+            out["genome"] = _loads(out["genome"])
+        return out
 
     # ── Historical bars cache ──────────────────────────────────────────────────
     def store_bars(self, symbol: str, timeframe: str, bars: list[tuple[int, float, float, float, float, float]], source: str = "gate") -> None:
@@ -1130,62 +1716,103 @@ class Storage:
         Store historical bars in cache. bars = [(ts, open, high, low, close, volume), ...]
         Uses INSERT OR IGNORE to avoid duplicates.
         """
-        with self._lock:
-            self._conn.executemany(
-                "INSERT OR IGNORE INTO bars(symbol, timeframe, ts, open, high, low, close, volume, source) VALUES(?,?,?,?,?,?,?,?,?)",
-                [(symbol, timeframe, int(ts), float(o), float(h), float(l), float(c), float(v), source) for ts, o, h, l, c, v in bars]
-            )
-            self._conn.commit()
-
-    def get_bars(self, symbol: str, timeframe: str, start_ts: int | None = None, end_ts: int | None = None, limit: int | None = None) -> list[dict]:
+        # Full chunks go through one multi-row VALUES statement (~1.4x faster than
+        # executemany at 1k-100k bars, SQLite 3.40: one step per chunk instead of
+        # per row); the remainder uses executemany. Both beat shipping the batch
+        # through json_each, which re-walks the JSON for every json_extract.
+        rows = [
+            (symbol, timeframe, int(ts), float(o), float(h), float(l), float(c), float(v), source)
+            for ts, o, h, l, c, v in bars
+        ]
+        full = len(rows) - len(rows) % _BARS_PER_INSERT
+        with self._write():
+            for i in range(0, full, _BARS_PER_INSERT):
+                self._conn.execute(_INSERT_BARS_CHUNK_SQL, tuple(chain.from_iterable(rows[i:i + _BARS_PER_INSERT])))
+            self._conn.executemany(_INSERT_BAR_SQL, rows[full:])
+        key = (symbol, timeframe)
+        self._bars_version[key] = self._bars_version.get(key, 0) + 1
+
+    def get_bars(
+        self, symbol: str, timeframe: str, start_ts: int | None = None, end_ts: int | None = None,
+        limit: int | None = None, as_numpy: bool = False,
+    ) -> Any:
         """
         Retrieve cached bars for symbol+timeframe, optionally filtered by time range.
-        Returns list of dicts sorted by timestamp (oldest first).
+        Returns list of dicts sorted by timestamp (oldest first), or with
+        `as_numpy` a NumPy structured array with the same fields.
         """
-        sql = ["SELECT ts, open, high, low, close, volume, source FROM bars WHERE symbol = ? AND timeframe = ?"]
-        args: list = [symbol, timeframe]
-
-        if start_ts is not None:
-            sql.append("AND ts >= ?")
-            args.append(int(start_ts))
-        if end_ts is not None:
-            sql.append("AND ts <= ?")
-            args.append(int(end_ts))
-
-        sql.append("ORDER BY ts ASC")
-
-        if limit is not None:
-            sql.append("LIMIT ?")
-            args.append(int(limit))
+        if not as_numpy:
+            return list(self.iter_bars(symbol, timeframe, start_ts=start_ts, end_ts=end_ts, limit=limit))
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy not installed. Run: pip install numpy")
+        sql, args = _bars_query(symbol, timeframe, start_ts, end_ts, limit)
+        with self._read() as conn:
+            rows = conn.execute(sql, args).fetchall()
+        return np.array(rows, dtype=_BAR_DTYPE)
+
+    def get_bar_columns(
+        self, symbol: str, timeframe: str, start_ts: int | None = None, end_ts: int | None = None,
+        limit: int | None = None,
+    ) -> Dict[str, Any]:
+        """
+        Bars as one contiguous NumPy array per field ("ts", "open", "high", "low",
+        "close", "volume"), oldest first: the layout Strategy.on_bars_batch reads.
+        """
+        bars = self.get_bars(symbol, timeframe, start_ts=start_ts, end_ts=end_ts, limit=limit, as_numpy=True)
+        return {name: np.ascontiguousarray(bars[name]) for name in _BAR_DTYPE.names if name != "source"}
 
-        with self._lock:
-            cur = self._conn.execute(" ".join(sql), args)
-            rows = cur.fetchall()
+    def iter_bars(self, symbol: str, timeframe: str, start_ts: int | None = None, end_ts: int | None = None, limit: int | None = None) -> Iterator[dict]:
+        """
+        Streaming variant of get_bars: yields bar dicts as they are fetched, so
+        callers converting them (e.g. to Bar objects) never hold both copies.
+        """
+        # Column affinity already returns ts as int and OHLCV as float.
+        return self._iter_dicts(*_bars_query(symbol, timeframe, start_ts, end_ts, limit))
 
-        return [
-            {
-                "ts": int(r[0]),
-                "open": float(r[1]),
-                "high": float(r[2]),
-                "low": float(r[3]),
-                "close": float(r[4]),
-                "volume": float(r[5]),
-                "source": r[6],
-            }
-            for r in rows
-        ]
+    def get_last_n_bars(
+        self, symbol: str, timeframe: str, n: int, start_ts: int | None = None, end_ts: int | None = None
+    ) -> list[dict]:
+        """
+        The most recent `n` bars (oldest first), optionally within [start_ts, end_ts].
+        Only those rows are read, newest first off the bars key. Unbounded
+        lookups are cached per symbol+timeframe; a hit is only served while
+        store_bars has not written to it and MAX(ts) on disk still matches.
+        """
+        if n <= 0:
+            return []
+        key = (symbol, timeframe)
+        cacheable = start_ts is None and end_ts is None
+        version = self._bars_version.get(key, 0)
+        hit = self._last_bars_cache.get(key) if cacheable else None
+        with self._read() as conn:
+            if hit and hit[0] == version and hit[1] >= n:
+                cached = hit[2]
+                since = cached[0][0] if cached else -(1 << 63)
+                newest, count = conn.execute(_BARS_TAIL_SQL, (symbol, timeframe, since)).fetchone()
+                if newest == (cached[-1][0] if cached else None) and count == len(cached):
+                    return [dict(zip(_BAR_FIELDS, r)) for r in cached[-n:]]
+            args: list = [symbol, timeframe]
+            if start_ts is not None:
+                args.append(int(start_ts))
+            if end_ts is not None:
+                args.append(int(end_ts))
+            args.append(int(n))
+            rows = conn.execute(_LAST_BARS_SQL[(start_ts is not None, end_ts is not None)], args).fetchall()
+        rows.reverse()
+        if cacheable:
+            _cache_put(self._last_bars_cache, key, (version, n, rows))
+        return [dict(zip(_BAR_FIELDS, r)) for r in rows]
 
     def get_bar_coverage(self, symbol: str, timeframe: str) -> dict[str, Any] | None:
         """
         Get coverage statistics for cached bars (min/max timestamp, count).
         Returns None if no bars cached.
         """
-        with self._lock:
-            cur = self._conn.execute(
+        with self._read() as conn:
+            row = conn.execute(
                 "SELECT MIN(ts), MAX(ts), COUNT(*) FROM bars WHERE symbol = ? AND timeframe = ?",
                 (symbol, timeframe)
-            )
-            row = cur.fetchone()
+            ).fetchone()
 
         if not row or row[2] == 0:
             return None
@@ -1193,39 +1820,41 @@ class Storage:
         return {
             "symbol": symbol,
             "timeframe": timeframe,
-            "start_ts": int(row[0]),
-            "end_ts": int(row[1]),
-            "count": int(row[2]),
+            "start_ts": row[0],
+            "end_ts": row[1],
+            "count": row[2],
         }
 
     # ── Settings ───────────────────────────────────────────────────────────────
     def get_setting(self, key: str, default: Any = None) -> Any:
         """Get a setting value from database. Returns default if not found."""
-        with self._lock:
-            cur = self._conn.execute("SELECT value FROM settings WHERE key = ?", (key,))
-            row = cur.fetchone()
-
+        with self._read() as conn:
+            row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
         if not row:
             return default
+        raw = row[0]
 
         # Try to parse as JSON, fallback to raw string
         try:
-            return json.loads(row[0])
+            return _loads(raw)
         except (json.JSONDecodeError, TypeError):
-            return row[0]
+            return raw
 
     def set_setting(self, key: str, value: Any) -> None:
         """Set a setting value in database. Value will be JSON-encoded."""
-        value_json = json.dumps(value) if not isinstance(value, str) else value
-        with self._lock:
+        value_json = _dumps(value) if not isinstance(value, str) else value
+        with self._write():
+            # Settings are shared by every worker process, so "unchanged" is
+            # decided against the table: an equal value updates no row and the
+            # commit appends nothing to the WAL.
             self._conn.execute(
                 """
                 INSERT INTO settings(key, value) VALUES(?,?)
                 ON CONFLICT(key) DO UPDATE SET value=excluded.value
+                WHERE value IS NOT excluded.value
                 """,
                 (key, value_json)
             )
-            self._conn.commit()
 
     # ── Price Alerts ───────────────────────────────────────────────────────────
     def create_price_alert(
@@ -1236,7 +1865,7 @@ class Storage:
             raise ValueError(f"Invalid condition: {condition}. Must be 'above' or 'below'")
 
         now = int(time.time())
-        with self._lock:
+        with self._write():
             cur = self._conn.execute(
                 """
                 INSERT INTO price_alerts(symbol, target_price, condition, email, status, created_ts)
@@ -1244,48 +1873,13 @@ class Storage:
                 """,
                 (symbol, float(target_price), condition, email, "active", now),
             )
-            self._conn.commit()
             return cur.lastrowid
 
     def list_price_alerts(self, status: str | None = None, email: str | None = None) -> list[dict]:
         """List price alerts, optionally filtered by status and/or email."""
-        sql = [
-            """
-            SELECT id, symbol, target_price, condition, email, status, created_ts, triggered_ts, last_checked_price
-            FROM price_alerts
-            WHERE 1=1
-            """
-        ]
-        args = []
-
-        if status:
-            sql.append("AND status = ?")
-            args.append(status)
-
-        if email:
-            sql.append("AND email = ?")
-            args.append(email)
-
-        sql.append("ORDER BY created_ts DESC")
-
-        with self._lock:
-            cur = self._conn.execute(" ".join(sql), args)
-            rows = cur.fetchall()
-
-        return [
-            {
-                "id": int(r[0]),
-                "symbol": r[1],
-                "target_price": float(r[2]),
-                "condition": r[3],
-                "email": r[4],
-                "status": r[5],
-                "created_ts": int(r[6]),
-                "triggered_ts": int(r[7]) if r[7] else None,
-                "last_checked_price": float(r[8]) if r[8] else None,
-            }
-            for r in rows
-        ]
+        args = [v for v in (status, email) if v]
+        sql = _LIST_ALERTS_SQL[(bool(status), bool(email))]
+        return list(self._iter_dicts(sql, args))
 
     def get_active_price_alerts(self) -> list[dict]:
         """Get all active price alerts."""
@@ -1302,7 +1896,7 @@ class Storage:
         if status not in ("active", "triggered", "cancelled"):
             raise ValueError(f"Invalid status: {status}")
 
-        with self._lock:
+        with self._write():
             if triggered_ts is not None:
                 cur = self._conn.execute(
                     "UPDATE price_alerts SET status = ?, triggered_ts = ?, last_checked_price = ? WHERE id = ?",
@@ -1318,24 +1912,21 @@ class Storage:
                     "UPDATE price_alerts SET status = ? WHERE id = ?",
                     (status, int(alert_id)),
                 )
-            self._conn.commit()
             return cur.rowcount > 0
 
     def update_alert_last_checked_price(self, alert_id: int, price: float) -> bool:
         """Update the last checked price for an alert. Returns True if updated."""
-        with self._lock:
+        with self._write():
             cur = self._conn.execute(
                 "UPDATE price_alerts SET last_checked_price = ? WHERE id = ?",
                 (float(price), int(alert_id)),
             )
-            self._conn.commit()
             return cur.rowcount > 0
 
     def delete_price_alert(self, alert_id: int) -> bool:
         """Delete a price alert. Returns True if deleted."""
-        with self._lock:
+        with self._write():
             cur = self._conn.execute("DELETE FROM price_alerts WHERE id = ?", (int(alert_id),))
-            self._conn.commit()
             return cur.rowcount > 0
 
     def cleanup_old_triggered_alerts(self, days: int = 30) -> int:
@@ -1351,12 +1942,11 @@ class Storage:
         import time
 
         cutoff_ts = int(time.time()) - (days * 24 * 60 * 60)
-        with self._lock:
+        with self._write():
             cur = self._conn.execute(
                 "DELETE FROM price_alerts WHERE status = 'triggered' AND triggered_ts < ?",
                 (cutoff_ts,),
             )
-            self._conn.commit()
             return cur.rowcount
 
 
@@ -3,9 +3,16 @@
 from __future__ import annotations
 
 from collections import deque
-from typing import Iterable, Deque
+from typing import Iterable, Deque, Mapping, Tuple
 from app.core import Bar, Strategy
 
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 
 # ----- Built-in parameter grids (reasonable defaults for 1m/5m/1h) -----
 MR_GRID = [
@@ -27,29 +34,116 @@ TF_GRID = [
 ]
 
 
-def _sma(vals: Iterable[float], n: int) -> float:
-    xs = list(vals)
-    return sum(xs[-n:]) / float(n) if len(xs) >= n else sum(xs) / max(1, len(xs))
+class _RollingMean:
+    """
+    Mean of the last `n` values in O(1) per push via a running sum. The sum is
+    recomputed from the window every `n` pushes so float drift can't build up.
+    """
+    __slots__ = ("n", "window", "total", "_pushes")
+
+    def __init__(self, n: int):
+        self.n = n
+        self.window: Deque[float] = deque(maxlen=n)
+        self.total = 0.0
+        self._pushes = 0
+
+    def push(self, x: float) -> None:
+        if len(self.window) == self.n:
+            self.total -= self.window[0]
+        self.window.append(x)
+        self._pushes += 1
+        if self._pushes >= self.n:
+            self.total = sum(self.window)
+            self._pushes = 0
+        else:
+            self.total += x
+
+    def __len__(self) -> int:
+        return len(self.window)
+
+    @property
+    def mean(self) -> float:
+        return self.total / len(self.window)
+
+
+def _require_numpy() -> None:
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("NumPy not installed. Run: pip install numpy")
+
+
+def bar_arrays(bars: Iterable[Bar]) -> dict:
+    """Column arrays ("high", "low", "close") for on_bars_batch from Bar objects."""
+    _require_numpy()
+    bars = list(bars)
+    return {
+        key: np.fromiter((getattr(b, key) for b in bars), dtype=np.float64, count=len(bars))
+        for key in ("high", "low", "close")
+    }
 
 
-class MeanReversion(Strategy):
+def _rolling_mean(x: "np.ndarray", n: int) -> "np.ndarray":
+    """Trailing mean of up to `n` values at every index (shorter at the start)."""
+    sums = np.convolve(x, np.ones(n))[:len(x)]
+    return sums / np.minimum(np.arange(1, len(x) + 1), n)
+
+
+def _confirmed(raw: "np.ndarray", start: int, confirm_bars: int) -> "np.ndarray":
+    """
+    Vector form of the on_bar confirmation rule: from `start` (the first bar past
+    warm-up) a raw signal is emitted once it has held for `confirm_bars` bars.
+    """
+    out = np.zeros(len(raw))
+    r = raw[start:]
+    if len(r):
+        idx = np.arange(len(r))
+        changed = np.empty(len(r), dtype=bool)
+        changed[0] = True
+        np.not_equal(r[1:], r[:-1], out=changed[1:])
+        run = idx - np.maximum.accumulate(np.where(changed, idx, 0)) + 1
+        out[start:] = np.where(run >= confirm_bars, r, 0.0)
+    return out
+
+
+class _ConfirmMixin:
+    """
+    Debouncer shared by the built-in strategies: a raw signal is only emitted
+    once it has held for `confirm_bars` consecutive bars (on_bars_batch uses
+    the vector form, _confirmed).
+    """
+    confirm_bars: int
+    _signal_bars: int = 0
+    _current_signal: float = 0.0
+
+    def _confirm(self, raw_signal: float) -> float:
+        if raw_signal == self._current_signal:
+            self._signal_bars += 1
+        else:
+            self._signal_bars = 1
+            self._current_signal = raw_signal
+        return raw_signal if self._signal_bars >= self.confirm_bars else 0.0
+
+
+_DEV_CHUNK = 4096  # windows per block in MeanReversion.on_bars_batch (bounds temp memory)
+
+
+class MeanReversion(_ConfirmMixin, Strategy):
     def __init__(self, lookback: int = 20, band: float = 2.0, confirm_bars: int = 2):
         self.lookback = lookback
         self.band = band
         self.confirm_bars = confirm_bars
-        self._closes: Deque[float] = deque(maxlen=max(lookback, 50))
-        self._signal_bars: int = 0
-        self._current_signal: float = 0.0
+        self._closes = _RollingMean(lookback)
 
     def on_bar(self, bars: Iterable[Bar]) -> float:
         for b in bars:
-            self._closes.append(b.close)
+            self._closes.push(b.close)
         if len(self._closes) < self.lookback:
             return 0.0
-        ma = _sma(self._closes, self.lookback)
-        # crude stdev proxy
-        dev = (_sma([abs(c - ma) for c in self._closes], self.lookback) or 1.0)
-        last = self._closes[-1]
+        ma = self._closes.mean
+        # crude stdev proxy: mean absolute deviation from the current MA (the MA
+        # moves every bar, so this one can't be kept as a running sum)
+        window = self._closes.window
+        dev = (sum(abs(c - ma) for c in window) / self.lookback) or 1.0
+        last = window[-1]
 
         # Calculate raw signal
         raw_signal = 0.0
@@ -58,76 +152,111 @@ class MeanReversion(Strategy):
         elif last > ma + self.band * dev:
             raw_signal = -1.0
 
-        # Require confirmation: same signal for N consecutive bars
-        if raw_signal == self._current_signal:
-            self._signal_bars += 1
-        else:
-            self._signal_bars = 1
-            self._current_signal = raw_signal
+        return self._confirm(raw_signal)
 
-        if self._signal_bars >= self.confirm_bars:
-            return raw_signal
-        return 0.0
+    def on_bars_batch(self, arrays: Mapping[str, "np.ndarray"]) -> "np.ndarray":
+        """
+        Signals for a whole series in one pass: element i equals what on_bar
+        returns for bar i when a fresh instance is fed one bar per call.
+        `arrays` holds column arrays (e.g. Storage.get_bar_columns); only
+        "close" is read. Does not touch the incremental state.
+        """
+        _require_numpy()
+        close = np.asarray(arrays["close"], dtype=np.float64)
+        n = self.lookback
+        raw = np.zeros(len(close))
+        if len(close) < n:
+            return raw
+        ma = _rolling_mean(close, n)[n - 1:]
+        windows = sliding_window_view(close, n)
+        dev = np.empty(len(ma))
+        for i in range(0, len(ma), _DEV_CHUNK):
+            j = i + _DEV_CHUNK
+            dev[i:j] = np.abs(windows[i:j] - ma[i:j, None]).sum(axis=1) / n
+        dev[dev == 0.0] = 1.0
+        last = close[n - 1:]
+        raw[n - 1:] = np.where(last < ma - self.band * dev, 1.0, np.where(last > ma + self.band * dev, -1.0, 0.0))
+        return _confirmed(raw, n - 1, self.confirm_bars)
 
     def to_params(self) -> dict:
         return {"lookback": self.lookback, "band": self.band}
 
 
-class Breakout(Strategy):
+class Breakout(_ConfirmMixin, Strategy):
     def __init__(self, lookback: int = 50, confirm_bars: int = 2):
         self.lookback = lookback
         self.confirm_bars = confirm_bars
-        self._highs: Deque[float] = deque(maxlen=lookback)
-        self._lows: Deque[float] = deque(maxlen=lookback)
-        self._signal_bars: int = 0
-        self._current_signal: float = 0.0
+        # Monotonic deques of (bar index, value): highs strictly decreasing and
+        # lows strictly increasing from the front, so the front is the window
+        # max/min and each bar is pushed and popped at most once.
+        self._max_highs: Deque[Tuple[int, float]] = deque()
+        self._min_lows: Deque[Tuple[int, float]] = deque()
+        self._bar_index: int = 0
+        self._last_close: float = 0.0
 
     def on_bar(self, bars: Iterable[Bar]) -> float:
+        max_h, min_l = self._max_highs, self._min_lows
         for b in bars:
-            self._highs.append(b.high)
-            self._lows.append(b.low)
-        if len(self._highs) < self.lookback:
+            i = self._bar_index
+            while max_h and max_h[-1][1] <= b.high:
+                max_h.pop()
+            max_h.append((i, b.high))
+            while min_l and min_l[-1][1] >= b.low:
+                min_l.pop()
+            min_l.append((i, b.low))
+            if max_h[0][0] <= i - self.lookback:
+                max_h.popleft()
+            if min_l[0][0] <= i - self.lookback:
+                min_l.popleft()
+            self._bar_index = i + 1
+            self._last_close = b.close
+        if self._bar_index < self.lookback:
             return 0.0
-        last = bars[-1].close if hasattr(bars, "__getitem__") else list(bars)[-1].close
+        last = self._last_close
 
         # Calculate raw signal
         raw_signal = 0.0
-        if last >= max(self._highs):
+        if last >= max_h[0][1]:
             raw_signal = +1.0
-        elif last <= min(self._lows):
+        elif last <= min_l[0][1]:
             raw_signal = -1.0
 
-        # Require confirmation: same signal for N consecutive bars
-        if raw_signal == self._current_signal:
-            self._signal_bars += 1
-        else:
-            self._signal_bars = 1
-            self._current_signal = raw_signal
+        return self._confirm(raw_signal)
 
-        if self._signal_bars >= self.confirm_bars:
-            return raw_signal
-        return 0.0
+    def on_bars_batch(self, arrays: Mapping[str, "np.ndarray"]) -> "np.ndarray":
+        """Vectorized on_bar over a whole series; reads "high", "low" and "close"."""
+        _require_numpy()
+        close = np.asarray(arrays["close"], dtype=np.float64)
+        n = self.lookback
+        raw = np.zeros(len(close))
+        if len(close) < n:
+            return raw
+        hi = sliding_window_view(np.asarray(arrays["high"], dtype=np.float64), n).max(axis=1)
+        lo = sliding_window_view(np.asarray(arrays["low"], dtype=np.float64), n).min(axis=1)
+        last = close[n - 1:]
+        raw[n - 1:] = np.where(last >= hi, 1.0, np.where(last <= lo, -1.0, 0.0))
+        return _confirmed(raw, n - 1, self.confirm_bars)
 
     def to_params(self) -> dict:
         return {"lookback": self.lookback}
 
 
-class TrendFollow(Strategy):
+class TrendFollow(_ConfirmMixin, Strategy):
     def __init__(self, fast: int = 10, slow: int = 50, confirm_bars: int = 2):
         self.fast = fast
         self.slow = slow
         self.confirm_bars = confirm_bars
-        self._closes: Deque[float] = deque(maxlen=max(slow, 200))
-        self._signal_bars: int = 0
-        self._current_signal: float = 0.0
+        self._fast = _RollingMean(fast)
+        self._slow = _RollingMean(slow)
 
     def on_bar(self, bars: Iterable[Bar]) -> float:
         for b in bars:
-            self._closes.append(b.close)
-        if len(self._closes) < self.slow:
+            self._fast.push(b.close)
+            self._slow.push(b.close)
+        if len(self._slow) < self.slow:
             return 0.0
-        ma_f = _sma(self._closes, self.fast)
-        ma_s = _sma(self._closes, self.slow)
+        ma_f = self._fast.mean
+        ma_s = self._slow.mean
 
         # Calculate raw signal
         raw_signal = 0.0
@@ -136,16 +265,20 @@ class TrendFollow(Strategy):
         elif ma_f < ma_s:
             raw_signal = -1.0
 
-        # Require confirmation: same signal for N consecutive bars
-        if raw_signal == self._current_signal:
-            self._signal_bars += 1
-        else:
-            self._signal_bars = 1
-            self._current_signal = raw_signal
+        return self._confirm(raw_signal)
 
-        if self._signal_bars >= self.confirm_bars:
-            return raw_signal
-        return 0.0
+    def on_bars_batch(self, arrays: Mapping[str, "np.ndarray"]) -> "np.ndarray":
+        """Vectorized on_bar over a whole series; reads "close"."""
+        _require_numpy()
+        close = np.asarray(arrays["close"], dtype=np.float64)
+        start = self.slow - 1
+        raw = np.zeros(len(close))
+        if len(close) <= start:
+            return raw
+        ma_f = _rolling_mean(close, self.fast)[start:]
+        ma_s = _rolling_mean(close, self.slow)[start:]
+        raw[start:] = np.sign(ma_f - ma_s)
+        return _confirmed(raw, start, self.confirm_bars)
 
     def to_params(self) -> dict:
         return {"fast": self.fast, "slow": self.slow}
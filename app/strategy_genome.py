@@ -13,30 +13,89 @@ This allows infinite strategy variations without writing new Python code.
 """
 from __future__ import annotations
 
+import hashlib
+import json
+import operator
 import random
-import copy
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass, field
+from typing import List, Dict, Any, Callable, Optional, Sequence, Union
+from dataclasses import dataclass, field, replace
 from collections import deque
 
 from app.core import Bar, Strategy
 
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Price series accepted by the calculators: a list of floats or, with NumPy
+# installed, a float64 array (GenomeStrategy passes arrays so each indicator
+# is a few vectorized reductions instead of a Python loop).
+Values = Union[Sequence[float], "np.ndarray"]
+
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Indicator Calculators
 # ──────────────────────────────────────────────────────────────────────────────
 
-def calculate_sma(values: List[float], period: int) -> Optional[float]:
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _ema_loop(values, period):  # pragma: no cover - compiled
+        # Same seed-then-recurrence as calculate_ema, as a compiled loop over a
+        # float64 array. No fastmath: it would reorder the seed sum.
+        ema = 0.0
+        for i in range(period):
+            ema += values[i]
+        ema /= period
+        multiplier = 2 / (period + 1)
+        for i in range(period, len(values)):
+            ema = (values[i] - ema) * multiplier + ema
+        return ema
+
+    @njit(cache=True)
+    def _ema_windows(values, period, window, at):  # pragma: no cover - compiled
+        # calculate_ema over the trailing `window` values ending at each index in `at`
+        out = np.full(len(at), np.nan)
+        for k in range(len(at)):
+            i = at[k]
+            start = max(0, i - window + 1)
+            if i + 1 - start >= period:
+                out[k] = _ema_loop(values[start:i + 1], period)
+        return out
+
+
+def calculate_sma(values: Values, period: int) -> Optional[float]:
     """Calculate Simple Moving Average."""
     if len(values) < period:
         return None
-    return sum(values[-period:]) / period
+    if NUMPY_AVAILABLE:
+        return float(np.asarray(values, dtype=np.float64)[-period:].sum()) / period
+    n = len(values)
+    return sum(values[i] for i in range(n - period, n)) / period
 
 
-def calculate_ema(values: List[float], period: int) -> Optional[float]:
+def calculate_ema(values: Values, period: int) -> Optional[float]:
     """Calculate Exponential Moving Average."""
     if len(values) < period:
         return None
+    if NUMPY_AVAILABLE and isinstance(values, np.ndarray):
+        if NUMBA_AVAILABLE:
+            return float(_ema_loop(values, period))
+        # the recurrence unrolled: the seed and every later value weighted by
+        # powers of (1 - multiplier), summed in C (equal up to rounding)
+        decay = 1 - 2 / (period + 1)
+        steps = len(values) - period
+        weights = decay ** np.arange(steps - 1, -1, -1, dtype=np.float64)
+        seed = float(values[:period].sum()) / period
+        return seed * decay ** steps + (1 - decay) * float(np.dot(weights, values[period:]))
 
     multiplier = 2 / (period + 1)
     ema = sum(values[:period]) / period  # Start with SMA
@@ -47,24 +106,28 @@ def calculate_ema(values: List[float], period: int) -> Optional[float]:
     return ema
 
 
-def calculate_rsi(values: List[float], period: int = 14) -> Optional[float]:
+def calculate_rsi(values: Values, period: int = 14) -> Optional[float]:
     """Calculate Relative Strength Index."""
     if len(values) < period + 1:
         return None
 
-    gains = []
-    losses = []
-
-    for i in range(1, len(values)):
-        change = values[i] - values[i - 1]
-        gains.append(max(change, 0))
-        losses.append(abs(min(change, 0)))
-
-    if len(gains) < period:
-        return None
+    if NUMPY_AVAILABLE:
+        # only the last `period` price changes feed the averages
+        changes = np.diff(np.asarray(values, dtype=np.float64)[-(period + 1):])
+        avg_gain = float(np.maximum(changes, 0.0).sum()) / period
+        avg_loss = float(-np.minimum(changes, 0.0).sum()) / period
+    else:
+        gain = loss = 0.0
+        n = len(values)
+        for i in range(n - period, n):
+            change = values[i] - values[i - 1]
+            if change > 0:
+                gain += change
+            else:
+                loss -= change
 
-    avg_gain = sum(gains[-period:]) / period
-    avg_loss = sum(losses[-period:]) / period
+        avg_gain = gain / period
+        avg_loss = loss / period
 
     if avg_loss == 0:
         return 100.0
@@ -75,15 +138,19 @@ def calculate_rsi(values: List[float], period: int = 14) -> Optional[float]:
     return rsi
 
 
-def calculate_bollinger_bands(values: List[float], period: int, std_dev: float) -> Optional[tuple[float, float, float]]:
+def calculate_bollinger_bands(values: Values, period: int, std_dev: float) -> Optional[tuple[float, float, float]]:
     """Calculate Bollinger Bands (lower, middle, upper)."""
     if len(values) < period:
         return None
 
-    recent = values[-period:]
-    middle = sum(recent) / period
-
-    variance = sum((x - middle) ** 2 for x in recent) / period
+    if NUMPY_AVAILABLE:
+        recent = np.asarray(values, dtype=np.float64)[-period:]
+        middle = float(recent.sum()) / period
+        variance = float(np.square(recent - middle).sum()) / period
+    else:
+        window = range(len(values) - period, len(values))
+        middle = sum(values[i] for i in window) / period
+        variance = sum((values[i] - middle) ** 2 for i in window) / period
     std = variance ** 0.5
 
     upper = middle + (std * std_dev)
@@ -92,35 +159,341 @@ def calculate_bollinger_bands(values: List[float], period: int, std_dev: float)
     return (lower, middle, upper)
 
 
-def calculate_atr(bars: List[Bar], period: int = 14) -> Optional[float]:
-    """Calculate Average True Range."""
-    if len(bars) < period + 1:
+def calculate_atr(highs: Values, lows: Values, closes: Values, period: int = 14) -> Optional[float]:
+    """Calculate Average True Range from parallel high/low/close series."""
+    if len(closes) < period + 1:
         return None
 
-    true_ranges = []
-    for i in range(1, len(bars)):
-        high = bars[i].high
-        low = bars[i].low
-        prev_close = bars[i - 1].close
-
-        tr = max(
+    if NUMPY_AVAILABLE:
+        high = np.asarray(highs, dtype=np.float64)[-period:]
+        low = np.asarray(lows, dtype=np.float64)[-period:]
+        prev_close = np.asarray(closes, dtype=np.float64)[-(period + 1):-1]
+        true_ranges = np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+        return float(true_ranges.sum()) / period
+
+    total = 0.0
+    n = len(closes)
+    for i in range(n - period, n):
+        high = highs[i]
+        low = lows[i]
+        prev_close = closes[i - 1]
+
+        total += max(
             high - low,
             abs(high - prev_close),
             abs(low - prev_close)
         )
-        true_ranges.append(tr)
 
-    if len(true_ranges) < period:
-        return None
+    return total / period
 
-    return sum(true_ranges[-period:]) / period
+
+class RollingStats:
+    """
+    Mean and population variance of the last `n` pushed values in O(1) per
+    push: a running sum and sum of squares over a ring buffer. Both sums are
+    recomputed from the window every `n` pushes so float drift can't build up.
+    """
+    __slots__ = ("n", "buf", "i", "count", "s", "s2", "_pushes")
+
+    def __init__(self, n: int):
+        self.n = n
+        self.buf = [0.0] * n
+        self.i = 0
+        self.count = 0
+        self.s = 0.0
+        self.s2 = 0.0
+        self._pushes = 0
+
+    def push(self, x: float) -> None:
+        old = self.buf[self.i]  # 0.0 until the window is full
+        self.buf[self.i] = x
+        self.i = (self.i + 1) % self.n
+        if self.count < self.n:
+            self.count += 1
+        self._pushes += 1
+        if self._pushes >= self.n:
+            self._resum()
+        else:
+            self.s += x - old
+            self.s2 += x * x - old * old
+
+    def extend(self, values: Sequence[float]) -> None:
+        """Push `values` in order; a batch covering the window just replaces it."""
+        if len(values) < self.n:
+            for x in values:
+                self.push(x)
+            return
+        self.buf = list(values[-self.n:])
+        self.i = 0
+        self.count = self.n
+        self._resum()
+
+    def _resum(self) -> None:
+        self.s = sum(self.buf)
+        self.s2 = sum(map(operator.mul, self.buf, self.buf))
+        self._pushes = 0
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.n
+
+    @property
+    def mean(self) -> float:
+        return self.s / self.n
+
+    @property
+    def variance(self) -> float:
+        mean = self.s / self.n
+        return max(self.s2 / self.n - mean * mean, 0.0)
+
+
+class _PriceBuffer:
+    """
+    Close/high/low of the last `cap` bars as contiguous series. With NumPy each
+    column is an array of twice the capacity: new values are written after the
+    current window, which is copied back to the front only when the end is
+    reached, so series() hands out views without copying. Without NumPy the
+    columns are bounded deques.
+    """
+    __slots__ = ("cap", "_cols", "_start", "_end")
+    FIELDS = ("close", "high", "low")
+
+    def __init__(self, cap: int):
+        self.cap = cap
+        self._start = 0
+        self._end = 0
+        if NUMPY_AVAILABLE:
+            self._cols = {name: np.empty(2 * cap) for name in self.FIELDS}
+        else:
+            self._cols = {name: deque(maxlen=cap) for name in self.FIELDS}
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def extend(self, columns: Dict[str, List[float]]) -> None:
+        """Append equal-length value lists, one per field."""
+        k = len(columns["close"])
+        if k > self.cap:
+            columns = {name: values[-self.cap:] for name, values in columns.items()}
+            k = self.cap
+        if not NUMPY_AVAILABLE:
+            for name, column in self._cols.items():
+                column.extend(columns[name])
+            self._end = len(self._cols["close"])
+            return
+        if self._end + k > 2 * self.cap:
+            keep = min(self._end - self._start, self.cap - k)
+            for arr in self._cols.values():
+                arr[:keep] = arr[self._end - keep:self._end]
+            self._start, self._end = 0, keep
+        for name, arr in self._cols.items():
+            arr[self._end:self._end + k] = columns[name]
+        self._end += k
+        self._start = max(self._start, self._end - self.cap)
+
+    def column(self, name: str) -> Values:
+        """One field's series, oldest first; a NumPy view is only valid until the next extend."""
+        if not NUMPY_AVAILABLE:
+            return list(self._cols[name])
+        return self._cols[name][self._start:self._end]
+
+    def last(self) -> Dict[str, float]:
+        """The latest bar's close/high/low."""
+        return {name: float(column[-1] if not NUMPY_AVAILABLE else column[self._end - 1])
+                for name, column in self._cols.items()}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Indicator Series
+# ──────────────────────────────────────────────────────────────────────────────
+# Whole-history forms of the calculators (NumPy only): element i is what the
+# calculator returns on the trailing `window` values ending at i, with NaN
+# where it would return None. Given `at`, they return only the elements at
+# those indices, computing nothing else.
+
+def _nan_series(n: int) -> "np.ndarray":
+    return np.full(n, np.nan)
+
+
+def _trailing_windows(x: "np.ndarray", period: int, at: "np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+    """The windows x[i - period + 1:i + 1] for the i in `at` that have one, and where those i are in `at`."""
+    full = np.flatnonzero(at >= period - 1)
+    return sliding_window_view(x, period)[at[full] - period + 1], full
+
+
+def _trailing_sum(x: "np.ndarray", period: int, at: Optional["np.ndarray"] = None) -> "np.ndarray":
+    """Sum of x[i - period + 1:i + 1] at every i (NaN before the first full window)."""
+    if at is None:
+        out = _nan_series(len(x))
+        if period <= len(x):
+            out[period - 1:] = sliding_window_view(x, period).sum(axis=-1)
+        return out
+    out = _nan_series(len(at))
+    if period <= len(x):
+        windows, full = _trailing_windows(x, period, at)
+        out[full] = windows.sum(axis=-1)
+    return out
+
+
+def _out_len(values: "np.ndarray", at: Optional["np.ndarray"]) -> int:
+    return len(values) if at is None else len(at)
+
+
+def sma_series(values: "np.ndarray", period: int, window: int, at: Optional["np.ndarray"] = None) -> "np.ndarray":
+    if period > window:
+        return _nan_series(_out_len(values, at))
+    return _trailing_sum(values, period, at) / period
+
+
+def ema_series(values: "np.ndarray", period: int, window: int, at: Optional["np.ndarray"] = None) -> "np.ndarray":
+    if period > min(window, len(values)):
+        return _nan_series(_out_len(values, at))
+    if at is None:
+        at = np.arange(len(values))
+    if NUMBA_AVAILABLE:
+        return _ema_windows(values, period, window, at)
+    out = _nan_series(len(at))
+    for k, i in enumerate(at.tolist()):
+        if i + 1 >= period:
+            out[k] = calculate_ema(values[max(0, i - window + 1):i + 1], period)
+    return out
+
+
+def rsi_series(closes: "np.ndarray", period: int, window: int, at: Optional["np.ndarray"] = None) -> "np.ndarray":
+    out = _nan_series(_out_len(closes, at))
+    if period + 1 > min(window, len(closes)):
+        return out
+    changes = np.diff(closes)  # changes[i - 1] is the move into bar i
+    before = None if at is None else at - 1
+    avg_gain = _trailing_sum(np.maximum(changes, 0.0), period, before) / period
+    avg_loss = -_trailing_sum(np.minimum(changes, 0.0), period, before) / period
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(avg_loss == 0, 100.0, 100 - (100 / (1 + avg_gain / avg_loss)))
+    if at is None:
+        out[1:] = rsi
+        return out
+    return rsi
+
+
+def bollinger_series(
+    values: "np.ndarray", period: int, std_dev: float, window: int, at: Optional["np.ndarray"] = None
+) -> tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Bollinger Bands series (lower, middle, upper)."""
+    middle = _nan_series(_out_len(values, at))
+    std = _nan_series(_out_len(values, at))
+    if period <= min(window, len(values)):
+        if at is None:
+            windows, full = sliding_window_view(values, period), slice(period - 1, None)
+        else:
+            windows, full = _trailing_windows(values, period, at)
+        middle[full] = windows.sum(axis=-1) / period
+        variance = np.square(windows - middle[full, None]).sum(axis=-1) / period
+        std[full] = variance ** 0.5
+    return (middle - std * std_dev, middle, middle + std * std_dev)
+
+
+def atr_series(
+    highs: "np.ndarray", lows: "np.ndarray", closes: "np.ndarray", period: int, window: int,
+    at: Optional["np.ndarray"] = None,
+) -> "np.ndarray":
+    out = _nan_series(_out_len(closes, at))
+    if period + 1 > min(window, len(closes)):
+        return out
+    prev_close = closes[:-1]
+    true_ranges = np.maximum.reduce([
+        highs[1:] - lows[1:], np.abs(highs[1:] - prev_close), np.abs(lows[1:] - prev_close)
+    ])
+    if at is None:
+        out[1:] = _trailing_sum(true_ranges, period) / period
+        return out
+    return _trailing_sum(true_ranges, period, at - 1) / period
+
+
+def _feed_stream(n: int, lookback: int) -> tuple["np.ndarray", "np.ndarray"]:
+    """
+    Bar indices in the order GenomeStrategy.on_bar pushes them into its buffer
+    when called at every bar with the trailing `lookback` bars, as Backtester
+    and the live bots do. Each call pushes its whole window (at most a buffer's
+    worth), so a bar is pushed again by every later call that still sees it.
+    Also returns, per bar, the stream length once that bar's call has pushed.
+    """
+    counts = np.minimum(np.arange(1, n + 1), min(lookback, _BUFFER_BARS))
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    idx = np.arange(ends[-1]) - np.repeat(starts, counts) + np.repeat(np.arange(n) - counts + 1, counts)
+    return idx, ends
+
+
+# Series computed by run_vectorized, shared across calls: a GA scores every
+# genome of a population on the same history and genomes repeat indicators
+# (SMA_20, RSI, ...), so each distinct one is computed once per process.
+# Keys start with a digest of the price arrays and the lookback, so different
+# data or feeding never collides. Cached arrays are read-only.
+_SERIES_CACHE_SIZE = 512
+_series_cache: Dict[tuple, Any] = {}
+
+
+def _cached_series(key: tuple, calc: Callable[..., Any], *args: Any) -> Any:
+    result = _series_cache.get(key)
+    if result is None:
+        result = calc(*args)
+        for arr in (result if isinstance(result, tuple) else (result,)):
+            arr.flags.writeable = False
+        if len(_series_cache) >= _SERIES_CACHE_SIZE:
+            _series_cache.pop(next(iter(_series_cache)), None)
+        _series_cache[key] = result
+    return result
+
+
+def clear_indicator_cache() -> None:
+    """Drop the cached indicator series (e.g. to free memory after an evolution run)."""
+    _series_cache.clear()
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Strategy Genome
 # ──────────────────────────────────────────────────────────────────────────────
 
-@dataclass
+def _copy_rule(rule: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy an entry/exit rule and its condition dicts (the values inside are scalars)."""
+    if "conditions" not in rule:
+        return dict(rule)
+    return {**rule, "conditions": [dict(condition) for condition in rule["conditions"]]}
+
+
+# Random indicator makers for mutation, each drawing its own parameters
+_MA_PERIODS = (10, 20, 50, 100, 200)
+_MA_SOURCES = ("close", "high", "low")
+_RSI_PERIODS = (7, 14, 21, 28)
+_BB_PERIODS = (10, 20, 30)
+_BB_STD_DEVS = (1.5, 2.0, 2.5, 3.0)
+_ATR_PERIODS = (7, 14, 21)
+
+
+def _random_sma() -> Dict[str, Any]:
+    return {"type": "SMA", "period": random.choice(_MA_PERIODS), "source": random.choice(_MA_SOURCES)}
+
+
+def _random_ema() -> Dict[str, Any]:
+    return {"type": "EMA", "period": random.choice(_MA_PERIODS), "source": random.choice(_MA_SOURCES)}
+
+
+def _random_rsi() -> Dict[str, Any]:
+    return {"type": "RSI", "period": random.choice(_RSI_PERIODS)}
+
+
+def _random_bb() -> Dict[str, Any]:
+    return {"type": "BB", "period": random.choice(_BB_PERIODS), "std_dev": random.choice(_BB_STD_DEVS)}
+
+
+def _random_atr() -> Dict[str, Any]:
+    return {"type": "ATR", "period": random.choice(_ATR_PERIODS)}
+
+
+_INDICATOR_FACTORIES = (_random_sma, _random_ema, _random_rsi, _random_bb, _random_atr)
+
+
+@dataclass(slots=True)
 class StrategyGenome:
     """
     Genetic representation of a trading strategy.
@@ -166,6 +539,10 @@ class StrategyGenome:
             "confirm_bars": self.confirm_bars,
         }
 
+    def stable_hash(self) -> bytes:
+        """Digest of to_dict() that is equal for equal genomes across processes."""
+        return hashlib.blake2b(json.dumps(self.to_dict(), sort_keys=True).encode()).digest()
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> StrategyGenome:
         """Create genome from dictionary."""
@@ -178,9 +555,22 @@ class StrategyGenome:
             confirm_bars=data.get("confirm_bars", 2),
         )
 
+    def clone(self) -> StrategyGenome:
+        """Independent copy (indicator and condition dicts are copied too)."""
+        return StrategyGenome(
+            indicators=[dict(indicator) for indicator in self.indicators],
+            entry_long=_copy_rule(self.entry_long),
+            exit_long=_copy_rule(self.exit_long),
+            entry_short=_copy_rule(self.entry_short),
+            exit_short=_copy_rule(self.exit_short),
+            confirm_bars=self.confirm_bars,
+        )
+
     def mutate(self) -> StrategyGenome:
         """Create a mutated copy of this genome."""
-        new_genome = copy.deepcopy(self)
+        # Shallow copy: each mutation below copies just the list/dicts it
+        # changes, the rest stays shared with this genome.
+        new_genome = replace(self)
 
         # Choose mutation type randomly
         mutation = random.choice([
@@ -193,15 +583,22 @@ class StrategyGenome:
         ])
 
         if mutation == "add_indicator":
+            new_genome.indicators = list(self.indicators)
             new_genome._add_random_indicator()
         elif mutation == "remove_indicator" and len(new_genome.indicators) > 1:
+            new_genome.indicators = list(self.indicators)
             new_genome.indicators.pop(random.randint(0, len(new_genome.indicators) - 1))
         elif mutation == "modify_indicator" and new_genome.indicators:
             idx = random.randint(0, len(new_genome.indicators) - 1)
+            new_genome.indicators = list(self.indicators)
+            new_genome.indicators[idx] = dict(self.indicators[idx])
             new_genome._mutate_indicator(idx)
         elif mutation == "modify_condition":
+            new_genome.entry_long = dict(self.entry_long)
             new_genome._mutate_condition()
         elif mutation == "modify_threshold":
+            new_genome.entry_long = _copy_rule(self.entry_long)
+            new_genome.exit_long = _copy_rule(self.exit_long)
             new_genome._mutate_threshold()
         elif mutation == "modify_confirm_bars":
             new_genome.confirm_bars = random.randint(1, 5)
@@ -210,30 +607,7 @@ class StrategyGenome:
 
     def _add_random_indicator(self):
         """Add a random indicator to the genome."""
-        indicator_type = random.choice(["SMA", "EMA", "RSI", "BB", "ATR"])
-
-        if indicator_type in ["SMA", "EMA"]:
-            self.indicators.append({
-                "type": indicator_type,
-                "period": random.choice([10, 20, 50, 100, 200]),
-                "source": random.choice(["close", "high", "low"])
-            })
-        elif indicator_type == "RSI":
-            self.indicators.append({
-                "type": "RSI",
-                "period": random.choice([7, 14, 21, 28])
-            })
-        elif indicator_type == "BB":
-            self.indicators.append({
-                "type": "BB",
-                "period": random.choice([10, 20, 30]),
-                "std_dev": random.choice([1.5, 2.0, 2.5, 3.0])
-            })
-        elif indicator_type == "ATR":
-            self.indicators.append({
-                "type": "ATR",
-                "period": random.choice([7, 14, 21])
-            })
+        self.indicators.append(random.choice(_INDICATOR_FACTORIES)())
 
     def _mutate_indicator(self, idx: int):
         """Mutate an existing indicator's parameters."""
@@ -269,14 +643,19 @@ class StrategyGenome:
         """Create a child genome by combining two parents."""
         child = cls()
 
-        # Mix indicators from both parents
-        all_indicators = parent1.indicators + parent2.indicators
-        num_indicators = min(len(all_indicators), random.randint(2, 5))
-        child.indicators = random.sample(all_indicators, num_indicators)
+        # Mix indicators from both parents, sampling positions in the two lists
+        # as if concatenated (same draws as sampling the concatenation)
+        first, second = parent1.indicators, parent2.indicators
+        n1 = len(first)
+        num_indicators = min(n1 + len(second), random.randint(2, 5))
+        child.indicators = [
+            first[i] if i < n1 else second[i - n1]
+            for i in random.sample(range(n1 + len(second)), num_indicators)
+        ]
 
         # Randomly choose entry/exit logic from either parent
-        child.entry_long = copy.deepcopy(random.choice([parent1.entry_long, parent2.entry_long]))
-        child.exit_long = copy.deepcopy(random.choice([parent1.exit_long, parent2.exit_long]))
+        child.entry_long = _copy_rule(random.choice([parent1.entry_long, parent2.entry_long]))
+        child.exit_long = _copy_rule(random.choice([parent1.exit_long, parent2.exit_long]))
 
         # Mix confirm_bars
         child.confirm_bars = random.choice([parent1.confirm_bars, parent2.confirm_bars])
@@ -284,41 +663,288 @@ class StrategyGenome:
         return child
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Rule Compilation
+# ──────────────────────────────────────────────────────────────────────────────
+
+RuleFn = Callable[[Dict[str, Any]], bool]
+
+
+def _never(indicators: Dict[str, Any]) -> bool:
+    return False
+
+
+# Condition operators; they work element-wise on NumPy arrays too (NaN, i.e. a
+# missing value, compares False). Any other op never matches.
+_OPS: Dict[str, Callable[[Any, Any], Any]] = {
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+    "==": lambda left, right: abs(left - right) < 1e-9,
+}
+
+
+def _compile_condition(condition: Dict[str, Any]) -> RuleFn:
+    """
+    Turn one condition dict into a closure over the indicator dict. Names and
+    the operator are read here once; a missing value on a bar is False.
+    """
+    cond_type = condition.get("type")
+    if cond_type not in ("indicator_compare", "price_compare"):
+        return _never
+
+    try:
+        left_name = condition["left"]
+        right = condition["right"]
+        op = condition["op"]
+    except KeyError as e:
+        # Malformed stored genome: fail when the rule is evaluated, as before
+        # compilation existed, rather than when the strategy is built.
+        def _missing_key(indicators: Dict[str, Any], _e: KeyError = e) -> bool:
+            raise _e
+        return _missing_key
+
+    op_fn = _OPS.get(op) if isinstance(op, str) else None
+    if op_fn is None:
+        return _never
+
+    # Right can be indicator name or numeric value (price_compare always names one)
+    if cond_type == "price_compare" or isinstance(right, str):
+        def _check(indicators: Dict[str, Any]) -> bool:
+            left_val = indicators.get(left_name)
+            if left_val is None:
+                return False
+            right_val = indicators.get(right)
+            if right_val is None:
+                return False
+            return op_fn(left_val, right_val)
+    else:
+        def _check(indicators: Dict[str, Any]) -> bool:
+            left_val = indicators.get(left_name)
+            if left_val is None:
+                return False
+            return op_fn(left_val, right)
+    return _check
+
+
+def _condition_cost(condition: Dict[str, Any]) -> Optional[int]:
+    """
+    Rough per-bar cost of a compiled condition, for ordering a rule's checks:
+    constant-False ones first, then numeric thresholds (one lookup), then
+    indicator-vs-indicator (two lookups). None for a malformed condition,
+    which must keep its place so it still fails where it used to.
+    """
+    if condition.get("type") not in ("indicator_compare", "price_compare"):
+        return 0
+    if not {"left", "right", "op"} <= condition.keys():
+        return None
+    if not isinstance(condition["op"], str) or condition["op"] not in _OPS:
+        return 0
+    if condition["type"] == "price_compare" or isinstance(condition["right"], str):
+        return 2
+    return 1
+
+
+def _compile_rule(rule: Dict[str, Any]) -> RuleFn:
+    """
+    Compile an entry/exit rule ({"conditions": [...], "logic": "AND"|"OR"}) into
+    a single predicate over a bar's indicator values, so the rule dicts are
+    interpreted once per genome instead of on every bar. Conditions are side
+    effect free, so they run cheapest first and stop at the first one that
+    decides the result.
+    """
+    if not rule or "conditions" not in rule:
+        return _never
+
+    conditions = rule["conditions"]
+    costs = [_condition_cost(condition) for condition in conditions]
+    if None not in costs:
+        conditions = [condition for _, condition in sorted(zip(costs, conditions), key=operator.itemgetter(0))]
+    checks = [_compile_condition(condition) for condition in conditions]
+
+    if rule.get("logic", "AND") == "AND":
+        def _all(indicators: Dict[str, Any]) -> bool:
+            for check in checks:
+                if not check(indicators):
+                    return False
+            return True
+        return _all
+
+    def _any(indicators: Dict[str, Any]) -> bool:  # OR
+        for check in checks:
+            if check(indicators):
+                return True
+        return False
+    return _any
+
+
+VectorRuleFn = Callable[[Dict[str, "np.ndarray"]], "np.ndarray"]
+
+
+def _compile_vector_condition(condition: Dict[str, Any]) -> Optional[VectorRuleFn]:
+    """_compile_condition over indicator series; None for a malformed condition."""
+    cond_type = condition.get("type")
+    if cond_type not in ("indicator_compare", "price_compare"):
+        return lambda series: np.zeros(len(series["close"]), dtype=bool)
+
+    try:
+        left_name = condition["left"]
+        right = condition["right"]
+        op = condition["op"]
+    except KeyError:
+        return None
+
+    op_fn = _OPS.get(op) if isinstance(op, str) else None
+
+    def _check(series: Dict[str, "np.ndarray"]) -> "np.ndarray":
+        left_val = series.get(left_name)
+        if cond_type == "price_compare" or isinstance(right, str):
+            right_val = series.get(right)
+        else:
+            right_val = right
+        if op_fn is None or left_val is None or right_val is None:
+            return np.zeros(len(series["close"]), dtype=bool)
+        return op_fn(left_val, right_val)
+    return _check
+
+
+def _compile_vector_rule(rule: Dict[str, Any]) -> Optional[VectorRuleFn]:
+    """
+    Compile a rule into a predicate over whole indicator series, giving the
+    per-bar results of _compile_rule as one boolean array. None when a
+    condition is malformed (on_bar only fails on such a rule if it reaches it).
+    """
+    if not rule or "conditions" not in rule:
+        return lambda series: np.zeros(len(series["close"]), dtype=bool)
+
+    checks = [_compile_vector_condition(condition) for condition in rule["conditions"]]
+    if None in checks:
+        return None
+
+    if rule.get("logic", "AND") == "AND":
+        def _all(series: Dict[str, "np.ndarray"]) -> "np.ndarray":
+            result = np.ones(len(series["close"]), dtype=bool)
+            for check in checks:
+                result &= check(series)
+            return result
+        return _all
+
+    def _any(series: Dict[str, "np.ndarray"]) -> "np.ndarray":  # OR
+        result = np.zeros(len(series["close"]), dtype=bool)
+        for check in checks:
+            result |= check(series)
+        return result
+    return _any
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Genome-based Strategy Executor
 # ──────────────────────────────────────────────────────────────────────────────
 
+def _indicator_plan(indicators: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    The genome's indicators that can affect a bar's values, in order. An
+    SMA/EMA/RSI/ATR entry overwrites its key outright, so only the last one
+    per key counts; a BB only overwrites where it has a value, so each
+    distinct BB stays (a repeat only needs its last occurrence). Unknown
+    types are dropped. If an entry is malformed the list is kept as is, so it
+    still fails where it did before.
+    """
+    keys = []
+    try:
+        for indicator in indicators:
+            ind_type = indicator["type"]
+            if ind_type not in ("SMA", "EMA", "RSI", "BB", "ATR"):
+                keys.append(None)
+                continue
+            period = indicator["period"]
+            if ind_type == "BB":
+                keys.append(("BB", period, indicator["std_dev"]))
+            elif ind_type in ("SMA", "EMA"):
+                keys.append(f"{ind_type}_{period}")
+            else:
+                keys.append(ind_type)
+        last = {key: i for i, key in enumerate(keys) if key is not None}
+    except (KeyError, TypeError):
+        return list(indicators)
+    return [indicators[i] for i in sorted(last.values())]
+
+
+_BUFFER_BARS = 300  # bars GenomeStrategy keeps for its indicators
+_MIN_BARS = 50  # buffered bars needed before a signal is produced
+
+
+def _source_field(source: str) -> str:
+    """Bar field an indicator "source" reads (anything unrecognised is the low)."""
+    return source if source in ("close", "high") else "low"
+
+
 class GenomeStrategy(Strategy):
     """Executes a strategy based on a genome definition."""
 
+    __slots__ = (
+        "genome", "confirm_bars", "_entry_long", "_plan", "_stats", "_sources", "_push_span",
+        "prices", "signal_count", "current_signal",
+    )
+
     def __init__(self, genome: StrategyGenome):
         self.genome = genome
         self.confirm_bars = genome.confirm_bars
+        # Only entry_long decides the signal: a bar that doesn't enter is flat
+        # whether or not exit_long matches, so the exit rule is never evaluated.
+        self._entry_long = _compile_rule(genome.entry_long)
+
+        # Running window stats per (period, bar field) for SMA and BB, so their
+        # values don't need a pass over the buffer; an SMA and a BB of the same
+        # period on closes share one. Periods past the buffer never fill.
+        self._plan = _indicator_plan(genome.indicators)
+        self._stats: Dict[tuple, RollingStats] = {}
+        for indicator in self._plan:
+            period = indicator.get("period")
+            if indicator.get("type") in ("SMA", "BB") and isinstance(period, int) and 0 < period <= _BUFFER_BARS:
+                field_name = _source_field(indicator.get("source", "close")) if indicator["type"] == "SMA" else "close"
+                self._stats.setdefault((period, field_name), RollingStats(period))
+        # Price series the EMA/RSI/ATR entries read from the buffer. Without
+        # any, a bar batch only needs enough of its tail to fill the stats and
+        # warm up (the buffer length can't then differ on either side of _MIN_BARS).
+        self._sources = set()
+        for indicator in self._plan:
+            ind_type = indicator.get("type")
+            if ind_type == "EMA":
+                self._sources.add(_source_field(indicator.get("source", "close")))
+            elif ind_type == "RSI":
+                self._sources.add("close")
+            elif ind_type == "ATR":
+                self._sources.update(_PriceBuffer.FIELDS)
+        if self._sources:
+            self._push_span = _BUFFER_BARS
+        else:
+            self._push_span = max([_MIN_BARS, *(period for period, _ in self._stats)])
 
         # State tracking
-        self.bars_buffer: deque = deque(maxlen=300)  # Keep last 300 bars
+        self.prices = _PriceBuffer(_BUFFER_BARS)
         self.signal_count = 0
         self.current_signal = 0.0
 
     def on_bar(self, bars: List[Bar]) -> float:
         """Process bars and return target exposure (-1 to +1)."""
-        # Update buffer
-        for bar in bars:
-            self.bars_buffer.append(bar)
-
-        if len(self.bars_buffer) < 50:  # Need minimum bars for indicators
+        # Update buffer (earlier bars in the batch would be pushed straight out)
+        recent = bars[-self._push_span:]
+        if recent:
+            columns = {name: [getattr(bar, name) for bar in recent] for name in _PriceBuffer.FIELDS}
+            self.prices.extend(columns)
+            for (period, field_name), stats in self._stats.items():
+                stats.extend(columns[field_name][-period:])
+
+        if len(self.prices) < _MIN_BARS:  # Need minimum bars for indicators
             return 0.0
 
         # Calculate all indicators
         indicator_values = self._calculate_indicators()
 
-        # Evaluate entry/exit conditions
-        raw_signal = 0.0
-
-        if self._evaluate_conditions(self.genome.entry_long, indicator_values):
-            raw_signal = 1.0
-        elif self._evaluate_conditions(self.genome.exit_long, indicator_values):
-            raw_signal = 0.0
+        # Evaluate entry conditions
+        raw_signal = 1.0 if self._entry_long(indicator_values) else 0.0
 
         # Require confirmation
         if raw_signal == self.current_signal:
@@ -333,22 +959,107 @@ class GenomeStrategy(Strategy):
         # Return previous signal if not confirmed
         return self.current_signal if self.signal_count > 0 else 0.0
 
+    def run_vectorized(
+        self, closes: "np.ndarray", highs: "np.ndarray", lows: "np.ndarray", *, lookback: int
+    ) -> Optional["np.ndarray"]:
+        """
+        Exposure at every bar of a whole history in one pass: element i is what
+        on_bar returns at bar i on a fresh strategy called at every bar with the
+        trailing `lookback` bars (Backtester's feeding; lookback=1 is one bar
+        per call). Each indicator is computed once as a series over the bars in
+        the order on_bar would buffer them (see _feed_stream) and the entry rule
+        is applied to the arrays. Returns None when the genome has a malformed
+        rule (callers fall back to on_bar). Does not touch the bar buffer.
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy not installed. Run: pip install numpy")
+        closes = np.asarray(closes, dtype=np.float64)
+        highs = np.asarray(highs, dtype=np.float64)
+        lows = np.asarray(lows, dtype=np.float64)
+
+        exposures = np.zeros(len(closes))
+        if len(closes) == 0:
+            return exposures
+        entry_long = _compile_vector_rule(self.genome.entry_long)
+        if entry_long is None:
+            return None
+
+        # Indicator values at bar i are taken at the end of that bar's pushes.
+        idx, ends = _feed_stream(len(closes), lookback)
+        at = ends - 1
+        prices = {"close": closes, "high": highs, "low": lows}
+        fed: Dict[str, "np.ndarray"] = {}
+
+        def stream(name: str) -> "np.ndarray":
+            if name not in fed:
+                fed[name] = prices[name][idx]
+            return fed[name]
+
+        window = _BUFFER_BARS
+        data_key = (len(closes), hash(closes.tobytes()), hash(highs.tobytes()), hash(lows.tobytes()), lookback)
+        series: Dict[str, "np.ndarray"] = {}
+        for indicator in self._plan:
+            ind_type = indicator["type"]
+
+            if ind_type == "SMA":
+                period = indicator["period"]
+                source = _source_field(indicator.get("source", "close"))
+                series[f"SMA_{period}"] = _cached_series(
+                    (data_key, "SMA", period, source), lambda: sma_series(stream(source), period, window, at)
+                )
+
+            elif ind_type == "EMA":
+                period = indicator["period"]
+                source = _source_field(indicator.get("source", "close"))
+                series[f"EMA_{period}"] = _cached_series(
+                    (data_key, "EMA", period, source), lambda: ema_series(stream(source), period, window, at)
+                )
+
+            elif ind_type == "RSI":
+                period = indicator["period"]
+                series["RSI"] = _cached_series(
+                    (data_key, "RSI", period), lambda: rsi_series(stream("close"), period, window, at)
+                )
+
+            elif ind_type == "BB":
+                period, std_dev = indicator["period"], indicator["std_dev"]
+                bands = _cached_series(
+                    (data_key, "BB", period, std_dev),
+                    lambda: bollinger_series(stream("close"), period, std_dev, window, at),
+                )
+                # on_bar leaves an earlier BB's values in place where this one is None
+                for key, band in zip(("BB_lower", "BB_middle", "BB_upper"), bands):
+                    earlier = series.get(key)
+                    series[key] = band if earlier is None else np.where(np.isnan(band), earlier, band)
+
+            elif ind_type == "ATR":
+                period = indicator["period"]
+                series["ATR"] = _cached_series(
+                    (data_key, "ATR", period),
+                    lambda: atr_series(stream("high"), stream("low"), stream("close"), period, window, at),
+                )
+
+        series.update(prices)
+
+        # on_bar's confirmation step updates current_signal before returning
+        # it, so its output is always the raw signal once the buffer holds
+        # _MIN_BARS bars.
+        raw_signal = entry_long(series)
+        return np.where(ends >= _MIN_BARS, raw_signal, exposures)
+
     def _calculate_indicators(self) -> Dict[str, Any]:
         """Calculate all indicators defined in the genome."""
         values = {}
-        bars_list = list(self.bars_buffer)
-        closes = [b.close for b in bars_list]
-        highs = [b.high for b in bars_list]
-        lows = [b.low for b in bars_list]
+        columns = {name: self.prices.column(name) for name in self._sources}
+        closes, highs, lows = columns.get("close"), columns.get("high"), columns.get("low")
 
-        for indicator in self.genome.indicators:
+        for indicator in self._plan:
             ind_type = indicator["type"]
 
             if ind_type == "SMA":
                 period = indicator["period"]
-                source = indicator.get("source", "close")
-                source_data = closes if source == "close" else (highs if source == "high" else lows)
-                values[f"SMA_{period}"] = calculate_sma(source_data, period)
+                stats = self._stats.get((period, _source_field(indicator.get("source", "close"))))
+                values[f"SMA_{period}"] = stats.mean if stats is not None and stats.full else None
 
             elif ind_type == "EMA":
                 period = indicator["period"]
@@ -363,93 +1074,24 @@ class GenomeStrategy(Strategy):
             elif ind_type == "BB":
                 period = indicator["period"]
                 std_dev = indicator["std_dev"]
-                bb = calculate_bollinger_bands(closes, period, std_dev)
-                if bb:
-                    values["BB_lower"], values["BB_middle"], values["BB_upper"] = bb
+                stats = self._stats.get((period, "close"))
+                if stats is not None and stats.full:
+                    middle = stats.mean
+                    std = stats.variance ** 0.5
+                    values["BB_lower"] = middle - (std * std_dev)
+                    values["BB_middle"] = middle
+                    values["BB_upper"] = middle + (std * std_dev)
 
             elif ind_type == "ATR":
                 period = indicator["period"]
-                values["ATR"] = calculate_atr(bars_list, period)
+                values["ATR"] = calculate_atr(highs, lows, closes, period)
 
         # Add current price
-        if bars_list:
-            values["close"] = bars_list[-1].close
-            values["high"] = bars_list[-1].high
-            values["low"] = bars_list[-1].low
+        if len(self.prices):
+            values.update(self.prices.last())
 
         return values
 
-    def _evaluate_conditions(self, rule: Dict[str, Any], indicators: Dict[str, Any]) -> bool:
-        """Evaluate a set of conditions (entry or exit rule)."""
-        if not rule or "conditions" not in rule:
-            return False
-
-        conditions = rule["conditions"]
-        logic = rule.get("logic", "AND")
-
-        results = []
-        for condition in conditions:
-            result = self._evaluate_single_condition(condition, indicators)
-            results.append(result)
-
-        if logic == "AND":
-            return all(results)
-        else:  # OR
-            return any(results)
-
-    def _evaluate_single_condition(self, condition: Dict[str, Any], indicators: Dict[str, Any]) -> bool:
-        """Evaluate a single condition."""
-        cond_type = condition.get("type")
-
-        if cond_type == "indicator_compare":
-            left_name = condition["left"]
-            right_value = condition["right"]
-            op = condition["op"]
-
-            left_val = indicators.get(left_name)
-            if left_val is None:
-                return False
-
-            # Right can be indicator name or numeric value
-            if isinstance(right_value, str):
-                right_val = indicators.get(right_value)
-                if right_val is None:
-                    return False
-            else:
-                right_val = right_value
-
-            return self._compare(left_val, op, right_val)
-
-        elif cond_type == "price_compare":
-            left_name = condition["left"]  # e.g., "close"
-            right_name = condition["right"]  # e.g., "SMA_20"
-            op = condition["op"]
-
-            left_val = indicators.get(left_name)
-            right_val = indicators.get(right_name)
-
-            if left_val is None or right_val is None:
-                return False
-
-            return self._compare(left_val, op, right_val)
-
-        return False
-
-    def _compare(self, left: float, op: str, right: float) -> bool:
-        """Compare two values."""
-        if op == ">":
-            return left > right
-        elif op == "<":
-            return left < right
-        elif op == ">=":
-            return left >= right
-        elif op == "<=":
-            return left <= right
-        elif op == "==":
-            return abs(left - right) < 1e-9
-        else:
-            return False
-
     def to_params(self) -> dict:
         """Return genome as parameters."""
         return self.genome.to_dict()
@@ -11,6 +11,7 @@ This script demonstrates:
 from app.backtest import Backtester
 from app.strategies import MeanReversion, Breakout, TrendFollow
 from app.data import GateAdapter
+from app.data_cache import CachedDataProvider
 import time
 
 
@@ -23,8 +24,9 @@ def run_single_backtest():
     # Create strategy
     strategy = MeanReversion(lookback=50, band=2.0, confirm_bars=2)
 
-    # Create data provider
-    data = GateAdapter()
+    # Create data provider (Backtester.run passes a date range, which the
+    # SQLite-backed cache supports)
+    data = CachedDataProvider(GateAdapter(), source_name="gate")
 
     # Create backtester
     backtester = Backtester(
@@ -77,10 +79,13 @@ def compare_strategies():
     print("EXAMPLE 2: Compare Strategies on BTC_USDT")
     print("=" * 80)
 
-    data = GateAdapter()
+    data = CachedDataProvider(GateAdapter(), source_name="gate")
     end_ts = int(time.time())
     start_ts = end_ts - (30 * 86400)
 
+    # Fetch the bars once; every strategy is tested on the same data
+    bars = data.history("BTC_USDT", "5m", limit=10000, start_ts=start_ts, end_ts=end_ts)
+
     strategies = [
         ("Mean Reversion", MeanReversion(lookback=50, band=2.0, confirm_bars=2)),
         ("Breakout", Breakout(lookback=60, confirm_bars=2)),
@@ -92,14 +97,7 @@ def compare_strategies():
     for name, strategy in strategies:
         print(f"\nTesting {name}...")
         backtester = Backtester(initial_capital=1000.0, min_notional=100.0)
-        metrics = backtester.run(
-            strategy=strategy,
-            data_provider=data,
-            symbol="BTC_USDT",
-            timeframe="5m",
-            start_ts=start_ts,
-            end_ts=end_ts,
-        )
+        metrics = backtester.run_on_bars(strategy, bars, timeframe="5m")
         results.append((name, metrics))
 
     # Print comparison
@@ -126,10 +124,13 @@ def test_parameter_grid():
     print("EXAMPLE 3: Parameter Optimization - Mean Reversion")
     print("=" * 80)
 
-    data = GateAdapter()
+    data = CachedDataProvider(GateAdapter(), source_name="gate")
     end_ts = int(time.time())
     start_ts = end_ts - (30 * 86400)
 
+    # Fetch the bars once for the whole grid
+    bars = data.history("BTC_USDT", "5m", limit=10000, start_ts=start_ts, end_ts=end_ts)
+
     # Test different lookback periods
     lookbacks = [20, 50, 100]
     bands = [2.0, 2.5]
@@ -141,14 +142,7 @@ def test_parameter_grid():
         for band in bands:
             strategy = MeanReversion(lookback=lookback, band=band, confirm_bars=2)
             backtester = Backtester(initial_capital=1000.0, min_notional=100.0)
-            metrics = backtester.run(
-                strategy=strategy,
-                data_provider=data,
-                symbol="BTC_USDT",
-                timeframe="5m",
-                start_ts=start_ts,
-                end_ts=end_ts,
-            )
+            metrics = backtester.run_on_bars(strategy, bars, timeframe="5m")
             results.append(((lookback, band), metrics))
             print(f"  lookback={lookback:3}, band={band:.1f} -> "
                   f"Return={metrics.total_return:>7.2f}%, Sharpe={metrics.sharpe_ratio:>6.2f}")
@@ -6,11 +6,19 @@ This script generates a bcrypt password hash that can be used in the .env file.
 Run this script to generate a new password hash for AUTH_PASSWORD_HASH.
 
 Usage:
-    python3 scripts/generate_password_hash.py
+    python3 scripts/generate_password_hash.py [--rounds N]
+
+The bcrypt cost (rounds, default 12 or $BCRYPT_ROUNDS) is paid again on every
+login, since the web app verifies the password against this hash. Each extra
+round doubles it; the time taken is printed so you can pick a value that is
+slow for an attacker but acceptable per login on your server.
 """
 
+import argparse
 import getpass
+import os
 import sys
+import time
 
 try:
     import bcrypt
@@ -20,12 +28,21 @@ except ImportError:
     sys.exit(1)
 
 
-def generate_hash(password: str) -> str:
+def generate_hash(password: str, rounds: int = 12) -> str:
     """Generate a bcrypt hash from a password."""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate a bcrypt hash for AUTH_PASSWORD_HASH.")
+    parser.add_argument(
+        "--rounds", type=int, default=int(os.getenv("BCRYPT_ROUNDS", "12")),
+        help="bcrypt cost factor, 4-31 (default: $BCRYPT_ROUNDS or 12)",
+    )
+    args = parser.parse_args()
+    if not 4 <= args.rounds <= 31:
+        parser.error("--rounds must be between 4 and 31")
+
     print("=" * 60)
     print("TradingBot Password Hash Generator")
     print("=" * 60)
@@ -49,14 +66,17 @@ def main():
         sys.exit(1)
 
     # Generate hash
-    print("\nGenerating hash...")
-    password_hash = generate_hash(password)
+    print(f"\nGenerating hash ({args.rounds} rounds)...")
+    started = time.perf_counter()
+    password_hash = generate_hash(password, args.rounds)
+    elapsed_ms = (time.perf_counter() - started) * 1000
 
     print("\n" + "=" * 60)
     print("Password hash generated successfully!")
     print("=" * 60)
     print("\nAdd this to your .env file:\n")
     print(f"AUTH_PASSWORD_HASH={password_hash}")
+    print(f"\nHashing took {elapsed_ms:.0f} ms; each login verification costs about the same.")
     print("\n" + "=" * 60)
 
 
@@ -11,10 +11,13 @@ Make sure you have set your API keys in .env file:
 """
 
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
-# Load .env file
-load_dotenv()
+# Load .env file (unless the keys already come from the environment, e.g. CI)
+if not (os.getenv("BINANCE_TESTNET_API_KEY") and os.getenv("BINANCE_TESTNET_API_SECRET")):
+    load_dotenv()
 
 # Import after loading env vars
 from app.execution import BinanceTestnetExec
@@ -48,10 +51,22 @@ def test_connection():
         print(f"❌ Failed to initialize client: {e}")
         return False
 
+    # The two probes are independent, so both requests go out at once and the
+    # wait is the slower round-trip rather than their sum; results are still
+    # reported in order below.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        ticker_future = pool.submit(client.exchange.fetch_ticker, 'BTC/USDT')
+        # This uses the /api/v3/account endpoint which is available on testnet
+        account_future = pool.submit(client.exchange.privateGetAccount)
+        return _report(client, ticker_future, account_future)
+
+
+def _report(client, ticker_future, account_future):
+    """Print the probe results (blocking on each future as it is reported)."""
     # Test market data access (public endpoint - doesn't need auth)
     try:
         print("\n→ Testing market data access...")
-        ticker = client.exchange.fetch_ticker('BTC/USDT')
+        ticker = ticker_future.result()
         print(f"✓ BTC/USDT Price: ${ticker['last']:,.2f}")
     except Exception as e:
         print(f"❌ Failed to fetch market data: {e}")
@@ -70,24 +85,24 @@ def test_connection():
     # Test account access using direct API endpoint
     try:
         print("\n→ Testing account access...")
-        # This uses the /api/v3/account endpoint which is available on testnet
-        response = client.exchange.privateGetAccount()
+        response = account_future.result()
         balances = response.get('balances', [])
 
         print("✓ Successfully authenticated with Binance testnet!")
 
         print("\n📊 Account Balances (Testnet):")
         print("-" * 60)
-        has_funds = False
+        lines = []  # written in one go: the testnet lists hundreds of assets
         for bal in balances:
             free = float(bal.get('free', 0))
             locked = float(bal.get('locked', 0))
             if free > 0 or locked > 0:
-                has_funds = True
                 total = free + locked
-                print(f"  {bal['asset']:8s}: {total:,.8f} (free: {free:,.8f}, locked: {locked:,.8f})")
+                lines.append(f"  {bal['asset']:8s}: {total:,.8f} (free: {free:,.8f}, locked: {locked:,.8f})")
 
-        if not has_funds:
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
+        else:
             print("  (No funds - visit https://testnet.binance.vision/ to get testnet funds)")
 
     except Exception as e:
@@ -223,7 +223,7 @@ def test_evolution_survives_all_failed_evaluations(monkeypatch):
     """If every genome fails to evaluate, evolve_generation must not crash."""
     from app.genetic_evolution import GeneticEvolver
 
-    evolver = GeneticEvolver(population_size=4, survivors=2)
+    evolver = GeneticEvolver(population_size=4, survivors=2, workers=1)
     evolver.initialize_population()
     population_before = len(evolver.population)
 
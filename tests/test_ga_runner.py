@@ -0,0 +1,57 @@
+"""Tests for parallel genome fitness evaluation (app/ga_runner.py).
+
+Deterministic and offline: synthetic bars, no data provider.
+"""
+import random
+
+from app.core import Bar
+from app.ga_runner import backtest_genome, evaluate_population
+from app.genetic_evolution import create_seed_genomes
+
+
+def _bars(n=300, seed=5):
+    rng = random.Random(seed)
+    px, out = 100.0, []
+    for i in range(n):
+        o = px
+        px *= 1 + rng.gauss(0, 0.02)
+        out.append(Bar(ts=i * 86400, open=o, high=max(o, px), low=min(o, px), close=px, volume=1.0))
+    return out
+
+
+def test_pool_matches_in_process_backtests():
+    bars = _bars()
+    genomes = create_seed_genomes()
+    kw = dict(symbol="BTC_USDT", timeframe="1d", initial_capital=1000.0, min_notional=10.0)
+    pooled = evaluate_population(genomes, bars, max_workers=2, **kw)
+    serial = [backtest_genome(g, bars, kw["symbol"], kw["timeframe"], kw["initial_capital"], kw["min_notional"])
+              for g in genomes]
+    assert [m.to_dict() for m in pooled] == [m.to_dict() for m in serial]
+    assert any(m.total_trades for m in serial)
+
+
+def test_evolver_only_backtests_unscored_genomes(monkeypatch):
+    from app import genetic_evolution
+    from app.genetic_evolution import GeneticEvolver
+
+    bars = _bars()
+    evolver = GeneticEvolver(workers=2)
+    evolver.data_provider = type("Provider", (), {"history": lambda self, *a, **kw: bars})()
+    submitted = []
+
+    def fake_pool(genomes, bars, **kw):
+        submitted.append(len(genomes))
+        return [backtest_genome(g, bars, kw["symbol"], kw["timeframe"], kw["initial_capital"], kw["min_notional"])
+                for g in genomes]
+
+    monkeypatch.setattr(genetic_evolution, "evaluate_population", fake_pool)
+    genomes = create_seed_genomes()
+    first = evolver.evaluate_population(genomes + [genomes[0].clone()], "BTC_USDT")
+    again = evolver.evaluate_population(genomes, "BTC_USDT")
+    assert submitted == [len(genomes), 0]
+    assert first[-1].metrics is first[0].metrics
+    assert [e.score for e in again] == [e.score for e in first[:-1]]
+
+    bars = bars[1:]  # new data: everything is scored again
+    evolver.evaluate_population(genomes, "BTC_USDT")
+    assert submitted[-1] == len(genomes)
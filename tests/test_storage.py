@@ -0,0 +1,359 @@
+"""Tests for the SQLite storage layer (app/storage.py).
+
+Deterministic and offline: each test uses a fresh temp-DB Storage.
+"""
+import os
+import sqlite3
+import tempfile
+import time
+
+import pytest
+
+from app.storage import Storage
+
+
+def _store():
+    db_path = os.path.join(tempfile.mkdtemp(prefix="tradintel_storage_"), "storage.db")
+    store = Storage(db_path)
+    store.upsert_bot(
+        name="b1", manager="m", symbol="BTC_USDT", tf="1m", strategy="Const",
+        params={}, allocation=1000.0, cash=1000.0, pos_qty=0.0, avg_price=0.0,
+        equity=1000.0, score=0.0, trades=0,
+    )
+    return store
+
+
+def test_queued_trades_are_visible_to_reads():
+    """record_trade is write-behind, but trade queries must still see it."""
+    store = _store()
+    store.record_trade("b1", "BTC_USDT", "buy", 1.0, 100.0, ts=1_000)
+    trades = store.list_trades()
+    assert len(trades) == 1
+    assert trades[0]["manager"] == "m"
+
+
+def test_bulk_trades_keep_order_after_queued_ones():
+    store = _store()
+    store.record_trade("b1", "BTC_USDT", "buy", 1.0, 100.0, ts=1_000)
+    store.record_trades_bulk([
+        (1_060, "b1", "BTC_USDT", "sell", 1.0, 110.0, 0.0, False),
+        (1_120, "b1", "BTC_USDT", "buy", 2.0, 105.0, 0.1, True),
+    ])
+    trades = store.list_trades()
+    assert [t["ts"] for t in trades] == [1_120, 1_060, 1_000]
+
+    roundtrips = store.list_roundtrips()
+    assert len(roundtrips) == 1
+    assert roundtrips[0]["pnl"] == pytest.approx(10.0)
+
+
+def test_reads_do_not_wait_on_writer_lock():
+    """Readers come from the pool, so a held writer lock doesn't block them."""
+    store = _store()
+    with store._lock:
+        assert list(store.load_bots()) == ["b1"]
+        assert store.get_setting("missing") is None
+
+
+def test_set_setting_skips_unchanged_value():
+    store = _store()
+    store.set_setting("trading_paused", True)
+    changes = store._conn.total_changes
+    store.set_setting("trading_paused", True)
+    assert store._conn.total_changes == changes
+    store.set_setting("trading_paused", False)
+    assert store.get_setting("trading_paused") is False
+
+
+def test_settings_are_shared_between_processes():
+    """Each gunicorn worker has its own Storage on the same file."""
+    worker_a = _store()
+    worker_b = Storage(worker_a.path)
+    worker_a.set_setting("trading_paused", True)
+    worker_b.set_setting("trading_paused", False)
+    assert worker_a.get_setting("trading_paused") is False
+    worker_a.set_setting("trading_paused", True)
+    assert worker_b.get_setting("trading_paused") is True
+
+
+def test_bar_coverage_follows_store_bars():
+    store = _store()
+    assert store.get_bar_coverage("BTC_USDT", "1m") is None
+    store.store_bars("BTC_USDT", "1m", [(60, 1.0, 2.0, 0.5, 1.5, 10.0)])
+    assert store.get_bar_coverage("BTC_USDT", "1m")["count"] == 1
+    store.store_bars("BTC_USDT", "1m", [(120, 1.5, 2.0, 1.0, 1.8, 5.0)])
+    assert store.get_bar_coverage("BTC_USDT", "1m")["end_ts"] == 120
+    Storage(store.path).store_bars("BTC_USDT", "1m", [(180, 1.8, 2.0, 1.5, 1.9, 5.0)])  # another process
+    assert store.get_bar_coverage("BTC_USDT", "1m")["count"] == 3
+
+
+def test_cached_evolved_strategy_returns_fresh_genome():
+    store = _store()
+    sid = store.save_evolved_strategy(
+        genome={"indicators": ["rsi"]}, symbol="BTC_USDT", timeframe="1h", score=1.0,
+        total_return=0.1, sharpe_ratio=1.0, max_drawdown=0.05, total_trades=3,
+        win_rate=0.5, generation=1, days=30, tested_ts=1_000,
+    )
+    store.get_evolved_strategy(sid)["genome"]["indicators"].append("ema")
+    assert store.get_evolved_strategy(sid)["genome"] == {"indicators": ["rsi"]}
+
+
+def test_get_evolved_strategies_by_ids():
+    store = _store()
+    ids = [
+        store.save_evolved_strategy(
+            genome={"gen": g}, symbol="BTC_USDT", timeframe="1h", score=float(g),
+            total_return=0.1, sharpe_ratio=1.0, max_drawdown=0.05, total_trades=3,
+            win_rate=0.5, generation=g, days=30, tested_ts=1_000,
+        )
+        for g in range(3)
+    ]
+    store.get_evolved_strategy(ids[0])  # one cached, the rest fetched together
+    got = store.get_evolved_strategies_by_ids([ids[2], 999, ids[0], ids[1]])
+    assert list(got) == [ids[2], ids[0], ids[1]]
+    assert [got[i]["genome"]["gen"] for i in ids] == [0, 1, 2]
+
+
+def test_list_evolved_strategies_projects_columns():
+    store = _store()
+    store.save_evolved_strategy(
+        genome={"gen": 0}, symbol="BTC_USDT", timeframe="1h", score=2.0,
+        total_return=0.1, sharpe_ratio=1.0, max_drawdown=0.05, total_trades=3,
+        win_rate=0.5, generation=0, days=30, tested_ts=1_000,
+    )
+    rows = store.list_evolved_strategies(columns=("id", "score"))
+    assert rows == [{"id": 1, "score": 2.0}]
+    with pytest.raises(ValueError):
+        store.list_evolved_strategies(columns=("genome_json",))
+
+
+def test_column_affinity_types_without_casts():
+    """REAL/INTEGER affinity types values on write, so reads need no casts."""
+    store = _store()
+    store.upsert_bot(
+        name="b2", manager="m", symbol="ETH_USDT", tf="1m", strategy="Const",
+        params={}, allocation=500, cash=500, pos_qty=0, avg_price=0,
+        equity=500, score=0, trades=0,
+    )
+    bot = store.load_bots()["b2"]
+    for key in ("allocation", "starting_allocation", "cash", "pos_qty", "avg_price", "equity", "score"):
+        assert type(bot[key]) is float, key
+    assert type(bot["trades"]) is int
+    store.store_bars("ETH_USDT", "1m", [(60, 1, 2, 1, 2, 3)])
+    bar = store.get_bars("ETH_USDT", "1m")[0]
+    assert type(bar["ts"]) is int and type(bar["close"]) is float
+
+
+def test_save_optimization_results_bulk_upserts():
+    store = _store()
+    result = dict(
+        strategy="MeanReversion", symbol="BTC_USDT", timeframe="1h", params={"n": 20},
+        score=1.0, total_return=0.1, sharpe_ratio=1.0, max_drawdown=0.05,
+        total_trades=3, win_rate=0.5, days=30, tested_ts=1_000,
+    )
+    store.save_optimization_results_bulk([result, {**result, "params": {"n": 50}}])
+    store.save_optimization_results_bulk([{**result, "score": 5.0}])
+    rows = store.list_optimization_results()
+    assert [(r["params"]["n"], r["score"]) for r in rows] == [(20, 5.0), (50, 1.0)]
+
+
+def test_upserts_return_the_updated_row_id():
+    store = _store()
+    kw = dict(strategy="MeanReversion", symbol="BTC_USDT", timeframe="1h",
+              initial_capital=1000.0, min_notional=10.0)
+    first = store.save_strategy(name="a", params={}, **kw)
+    store.save_strategy(name="b", params={}, **kw)
+    assert store.save_strategy(name="a", params={"n": 5}, **kw) == first
+
+
+def test_list_saved_strategies_keyset_pages():
+    store = _store()
+    kw = dict(strategy="MeanReversion", symbol="BTC_USDT", timeframe="1h",
+              params={}, initial_capital=1000.0, min_notional=10.0)
+    for name in "abcde":  # same created_ts second: ties broken by id
+        store.save_strategy(name=name, **kw)
+    seen, before = [], None
+    while page := store.list_saved_strategies(before=before, limit=2):
+        seen += [r["name"] for r in page]
+        before = (page[-1]["created_ts"], page[-1]["id"])
+    assert seen == [r["name"] for r in store.list_saved_strategies()] == list("edcba")
+
+
+def test_get_bars_as_numpy():
+    pytest.importorskip("numpy")
+    store = _store()
+    store.store_bars("BTC_USDT", "1m", [(60, 1.0, 2.0, 0.5, 1.5, 10.0), (120, 1.5, 2.5, 1.0, 2.0, 5.0)])
+    arr = store.get_bars("BTC_USDT", "1m", as_numpy=True)
+    assert arr["ts"].tolist() == [60, 120]
+    assert arr["close"].tolist() == [1.5, 2.0]
+
+
+def test_open_positions_skip_flat_symbols():
+    store = _store()
+    store.record_trades_bulk([
+        (1_000, "b1", "BTC_USDT", "buy", 0.1, 100.0, 0.0, False),
+        (1_060, "b1", "BTC_USDT", "buy", 0.2, 110.0, 0.0, False),
+        (1_120, "b1", "BTC_USDT", "SELL", 0.3, 120.0, 0.0, False),
+        (1_180, "b1", "ETH_USDT", "buy", 2.0, 10.0, 0.0, False),
+    ])
+    positions = store.list_open_positions()
+    assert [(p["symbol"], p["qty"]) for p in positions] == [("ETH_USDT", 2.0)]
+
+
+def test_queued_params_and_trades_flush_together():
+    store = _store()
+    store.record_params("b1", "Const", {"n": 1})
+    store.record_trade("b1", "BTC_USDT", "buy", 1.0, 100.0, ts=1_000)
+    store.record_params("b1", "Const", {"n": 2})
+    store.flush_trades()
+    rows = store._conn.execute("SELECT params_json FROM param_history ORDER BY id").fetchall()
+    assert [r[0] for r in rows] == ['{"n":1}', '{"n":2}']
+    assert len(store.list_trades()) == 1
+
+
+def test_checkpoint_truncate_empties_wal():
+    store = _store()
+    store.record_trade("b1", "BTC_USDT", "buy", 1.0, 100.0, ts=1_000)
+    store.checkpoint(truncate=True)
+    assert os.path.getsize(store.path + "-wal") == 0
+    assert len(store.list_trades()) == 1
+
+
+def test_get_bar_columns():
+    pytest.importorskip("numpy")
+    store = _store()
+    store.store_bars("BTC_USDT", "1m", [(60, 1.0, 2.0, 0.5, 1.5, 10.0), (120, 1.5, 2.5, 1.0, 2.0, 5.0)])
+    cols = store.get_bar_columns("BTC_USDT", "1m")
+    assert sorted(cols) == ["close", "high", "low", "open", "ts", "volume"]
+    assert cols["high"].tolist() == [2.0, 2.5]
+    assert cols["close"].flags["C_CONTIGUOUS"]
+
+
+def test_transaction_commits_once_and_rolls_back_on_error():
+    store = _store()
+    bot = dict(manager="m", symbol="ETH_USDT", tf="1m", strategy="Const", params={},
+               allocation=1.0, cash=1.0, pos_qty=0.0, avg_price=0.0, equity=1.0, score=0.0, trades=0)
+    with store.transaction():
+        store.upsert_bot(name="b2", **bot)
+        store.record_trade("b2", "ETH_USDT", "buy", 1.0, 10.0, ts=1_000)
+        store.record_trades_bulk([(1_060, "b2", "ETH_USDT", "sell", 1.0, 11.0, 0.0, False)])
+    assert "b2" in store.load_bots()
+    assert [t["ts"] for t in store.list_trades(bot_name="b2")] == [1_060, 1_000]
+
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.upsert_bot(name="b3", **bot)
+            raise RuntimeError("boom")
+    assert "b3" not in store.load_bots()
+
+
+def test_get_last_n_bars_follows_store_bars():
+    store = _store()
+    store.store_bars("BTC_USDT", "1m", [(ts, 1.0, 2.0, 0.5, 1.5, 10.0) for ts in (60, 120, 180, 240)])
+    assert [b["ts"] for b in store.get_last_n_bars("BTC_USDT", "1m", 3)] == [120, 180, 240]
+    assert [b["ts"] for b in store.get_last_n_bars("BTC_USDT", "1m", 2)] == [180, 240]  # cached
+    assert [b["ts"] for b in store.get_last_n_bars("BTC_USDT", "1m", 2, end_ts=180)] == [120, 180]
+    store.store_bars("BTC_USDT", "1m", [(300, 1.5, 2.0, 1.0, 1.8, 5.0)])
+    assert [b["ts"] for b in store.get_last_n_bars("BTC_USDT", "1m", 2)] == [240, 300]
+
+
+def test_get_last_n_bars_follows_other_writers():
+    store = _store()
+    store.store_bars("BTC_USDT", "1m", [(ts, 1.0, 2.0, 0.5, 1.5, 10.0) for ts in (60, 180, 240)])
+    assert [b["ts"] for b in store.get_last_n_bars("BTC_USDT", "1m", 5)] == [60, 180, 240]
+    other = Storage(store.path)  # another process
+    other.store_bars("BTC_USDT", "1m", [(300, 1.5, 2.0, 1.0, 1.8, 5.0)])
+    assert [b["ts"] for b in store.get_last_n_bars("BTC_USDT", "1m", 5)] == [60, 180, 240, 300]
+    other.store_bars("BTC_USDT", "1m", [(120, 1.5, 2.0, 1.0, 1.8, 5.0)])  # backfilled gap
+    assert [b["ts"] for b in store.get_last_n_bars("BTC_USDT", "1m", 5)] == [60, 120, 180, 240, 300]
+
+
+def test_failed_write_inside_transaction_is_undone_alone():
+    store = _store()
+    with store.transaction():
+        store.set_setting("kept", 1)
+        with pytest.raises(RuntimeError):
+            with store._write() as conn:
+                conn.execute("INSERT INTO settings(key, value) VALUES('dropped', '1')")
+                raise RuntimeError("boom")
+    assert store.get_setting("kept") == 1
+    assert store._conn.execute("SELECT COUNT(*) FROM settings WHERE key = 'dropped'").fetchone()[0] == 0
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.set_setting("kept", 2)
+            raise RuntimeError("boom")
+    assert store.get_setting("kept") == 1
+
+
+def test_in_memory_reads_inside_transaction():
+    store = Storage(":memory:")
+    with store.transaction():
+        store.set_setting("kept", 1)
+        assert store.get_setting("kept") == 1
+        assert store.list_trades() == []
+    assert store.get_setting("kept") == 1
+
+
+def test_queued_row_with_unknown_bot_is_logged_and_dropped(caplog):
+    store = _store()
+    store.record_trade("ghost", "BTC_USDT", "buy", 1.0, 100.0, ts=1_000)
+    store.record_trade("b1", "BTC_USDT", "buy", 1.0, 100.0, ts=1_060)
+    with caplog.at_level("ERROR", logger="app.storage"):
+        store.flush_trades()
+    assert [t["ts"] for t in store.list_trades()] == [1_060]
+    assert "ghost" in caplog.text
+
+
+def test_failed_flush_keeps_rows_queued_and_flusher_alive(monkeypatch, caplog):
+    monkeypatch.setattr("app.storage._WRITE_RETRY_S", 0.05)
+    store = _store()
+    store._conn.execute("PRAGMA busy_timeout=50")
+    blocker = sqlite3.connect(store.path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")  # another process holding the write lock
+    store.record_trade("b1", "BTC_USDT", "buy", 1.0, 100.0, ts=1_000)
+    with pytest.raises(sqlite3.OperationalError):
+        store.flush_trades()
+    store.record_trade("b1", "BTC_USDT", "sell", 1.0, 110.0, ts=1_060)
+    time.sleep(0.3)  # the background flusher fails too, and keeps retrying
+    blocker.execute("ROLLBACK")
+    deadline = time.time() + 5
+    while store._write_queue.qsize() and time.time() < deadline:
+        time.sleep(0.02)
+    assert [t["ts"] for t in store.list_trades()] == [1_060, 1_000]
+    assert "retrying" in caplog.text
+
+
+def test_list_and_get_return_full_precision_reals():
+    store = _store()
+    kw = dict(strategy="MeanReversion", symbol="BTC_USDT", timeframe="1h", params={})
+    sid = store.save_strategy(name="a", initial_capital=1234.5678901234567, min_notional=0.1 + 0.2, **kw)
+    listed = store.list_saved_strategies()[0]
+    got = store.get_saved_strategy(sid)
+    assert listed["initial_capital"] == got["initial_capital"] == 1234.5678901234567
+    assert listed["min_notional"] == got["min_notional"] == 0.30000000000000004
+    assert list(listed) == list(got)
+
+    eid = store.save_evolved_strategy(
+        genome={"gen": 0}, symbol="BTC_USDT", timeframe="1h", score=1e300 * 1.7976,
+        total_return=0.1, sharpe_ratio=1.0, max_drawdown=0.05, total_trades=3,
+        win_rate=0.5, generation=0, days=30, tested_ts=1_000,
+    )
+    assert store.get_evolved_strategy(eid)["score"] == store.list_evolved_strategies()[0]["score"] == 1e300 * 1.7976
+
+
+def test_nested_transaction_and_checkpoint_inside_it():
+    store = _store()
+    with store.transaction():
+        store.set_setting("outer", 1)
+        with store.transaction():
+            store.set_setting("inner", 1)
+        with pytest.raises(RuntimeError):
+            with store.transaction():
+                store.set_setting("dropped", 1)
+                raise RuntimeError("boom")
+        store.checkpoint()  # skipped, not deadlocked
+        with pytest.raises(RuntimeError):
+            store.checkpoint(truncate=True)
+    assert store.get_setting("outer") == store.get_setting("inner") == 1
+    assert store.get_setting("dropped") is None
+    store.checkpoint(truncate=True)
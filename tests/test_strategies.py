@@ -0,0 +1,60 @@
+"""Tests for the built-in strategies' incremental indicator state.
+
+Deterministic and offline: synthetic random-walk bars with a fixed seed.
+"""
+import random
+
+import pytest
+
+from app.core import Bar
+from app.strategies import Breakout, MeanReversion, TrendFollow, _RollingMean, bar_arrays
+
+
+def _closes(n, seed=3):
+    rng = random.Random(seed)
+    px, out = 100.0, []
+    for _ in range(n):
+        px *= 1 + rng.gauss(0, 0.01)
+        out.append(px)
+    return out
+
+
+def test_rolling_mean_matches_window_sum():
+    closes = _closes(1_000)
+    rm = _RollingMean(20)
+    for i, c in enumerate(closes):
+        rm.push(c)
+        window = closes[max(0, i - 19):i + 1]
+        assert rm.mean == pytest.approx(sum(window) / len(window), rel=1e-12)
+
+
+def test_breakout_window_extremes_match_naive_max_min():
+    closes = _closes(2_000)
+    bars = [
+        Bar(ts=i * 60, open=o, high=max(o, c), low=min(o, c), close=c, volume=1.0)
+        for i, (o, c) in enumerate(zip([100.0] + closes, closes))
+    ]
+    bo = Breakout(lookback=60)
+    for i, b in enumerate(bars):
+        bo.on_bar([b])
+        window = bars[max(0, i - 59):i + 1]
+        assert bo._max_highs[0][1] == max(w.high for w in window)
+        assert bo._min_lows[0][1] == min(w.low for w in window)
+
+
+@pytest.mark.parametrize("make", [
+    lambda: MeanReversion(lookback=20, band=1.0),
+    lambda: Breakout(lookback=30, confirm_bars=1),
+    lambda: TrendFollow(fast=10, slow=40, confirm_bars=3),
+])
+def test_on_bars_batch_matches_incremental_on_bar(make):
+    pytest.importorskip("numpy")
+    closes = _closes(1_500, seed=7)
+    bars = [
+        Bar(ts=i * 60, open=o, high=max(o, c), low=min(o, c), close=c, volume=1.0)
+        for i, (o, c) in enumerate(zip([100.0] + closes, closes))
+    ]
+    strat = make()
+    expected = [strat.on_bar([b]) for b in bars]
+    assert make().on_bars_batch(bar_arrays(bars)).tolist() == expected
+    assert any(expected)
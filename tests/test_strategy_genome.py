@@ -0,0 +1,204 @@
+"""Tests for the genome strategy indicator calculators and executor.
+
+Deterministic and offline: synthetic random-walk prices with a fixed seed.
+"""
+import random
+
+import pytest
+
+import app.strategy_genome as sg
+from app.core import Bar
+from app.genetic_evolution import create_seed_genomes
+
+
+def _ohlc(n, seed=3):
+    rng = random.Random(seed)
+    px, highs, lows, closes = 100.0, [], [], []
+    for _ in range(n):
+        o = px
+        px *= 1 + rng.gauss(0, 0.01)
+        highs.append(max(o, px) * 1.002)
+        lows.append(min(o, px) * 0.998)
+        closes.append(px)
+    return highs, lows, closes
+
+
+def _indicators(highs, lows, closes):
+    return (
+        sg.calculate_sma(closes, 20),
+        sg.calculate_ema(closes, 20),
+        sg.calculate_rsi(closes, 14),
+        sg.calculate_bollinger_bands(closes, 20, 2.0),
+        sg.calculate_atr(highs, lows, closes, 14),
+    )
+
+
+@pytest.mark.parametrize("numba", [True, False])
+def test_numpy_calculators_match_pure_python(monkeypatch, numba):
+    np = pytest.importorskip("numpy")
+    monkeypatch.setattr(sg, "NUMBA_AVAILABLE", sg.NUMBA_AVAILABLE and numba)
+    highs, lows, closes = _ohlc(300)
+    vectorized = _indicators(np.array(highs), np.array(lows), np.array(closes))
+    monkeypatch.setattr(sg, "NUMPY_AVAILABLE", False)
+    expected = _indicators(highs, lows, closes)
+    for got, want in zip(vectorized, expected):
+        assert got == pytest.approx(want, rel=1e-12)
+
+
+def test_calculators_need_enough_history():
+    highs, lows, closes = _ohlc(10)
+    assert _indicators(highs, lows, closes) == (None, None, None, None, None)
+
+
+def test_rolling_stats_track_the_window():
+    _, _, closes = _ohlc(500)
+    stats = sg.RollingStats(20)
+    for i, x in enumerate(closes):
+        stats.push(x)
+        if i == 10:
+            assert not stats.full
+    assert stats.mean == pytest.approx(sg.calculate_sma(closes, 20), rel=1e-12)
+    lower, middle, upper = sg.calculate_bollinger_bands(closes, 20, 1.0)
+    assert stats.variance ** 0.5 == pytest.approx(upper - middle, rel=1e-9)
+    stats.extend(closes[:30])  # a batch covering the window replaces it
+    assert stats.mean == pytest.approx(sg.calculate_sma(closes[:30], 20), rel=1e-12)
+
+
+def test_price_buffer_keeps_the_last_cap_bars():
+    from collections import deque
+    highs, lows, closes = _ohlc(400)
+    buf, ref = sg._PriceBuffer(50), deque(maxlen=50)
+    i = 0
+    for k in (1, 1, 30, 7, 50, 3, 120, 1, 49, 2):  # batches of varying size, some past cap
+        chunk = slice(i, i + k)
+        buf.extend({"close": closes[chunk], "high": highs[chunk], "low": lows[chunk]})
+        ref.extend(zip(closes[chunk], highs[chunk], lows[chunk]))
+        i += k
+        got = [list(buf.column(name)) for name in ("close", "high", "low")]
+        assert got == [[r[0] for r in ref], [r[1] for r in ref], [r[2] for r in ref]]
+        assert buf.last() == {"close": ref[-1][0], "high": ref[-1][1], "low": ref[-1][2]}
+
+
+def test_indicator_plan_keeps_what_sets_the_values():
+    sma_close = {"type": "SMA", "period": 20, "source": "close"}
+    sma_high = {"type": "SMA", "period": 20, "source": "high"}
+    rsi14, rsi7 = {"type": "RSI", "period": 14}, {"type": "RSI", "period": 7}
+    bb20, bb10 = {"type": "BB", "period": 20, "std_dev": 2.0}, {"type": "BB", "period": 10, "std_dev": 1.5}
+    plan = sg._indicator_plan([sma_close, rsi14, bb20, rsi7, bb10, sma_high, {"type": "MACD"}, bb20])
+    assert plan == [rsi7, bb10, sma_high, bb20]
+    malformed = [rsi14, {"type": "RSI"}]
+    assert sg._indicator_plan(malformed) == malformed
+
+
+def test_compiled_rules_follow_condition_semantics():
+    rsi_low = {"type": "indicator_compare", "left": "RSI", "op": "<", "right": 30}
+    above_sma = {"type": "price_compare", "left": "close", "op": ">", "right": "SMA_20"}
+    both = sg._compile_rule({"conditions": [rsi_low, above_sma], "logic": "AND"})
+    either = sg._compile_rule({"conditions": [rsi_low, above_sma], "logic": "OR"})
+
+    ind = {"RSI": 25.0, "close": 101.0, "SMA_20": 100.0}
+    assert both(ind) and either(ind)
+    ind["RSI"] = 45.0
+    assert not both(ind) and either(ind)
+    del ind["SMA_20"]  # missing indicator value -> condition is False
+    assert not either(ind)
+    assert not sg._compile_rule({})(ind)
+    assert not sg._compile_rule({"conditions": [{"type": "unknown"}]})(ind)
+
+
+def test_compiled_rules_keep_malformed_conditions_in_place():
+    rsi_high = {"type": "indicator_compare", "left": "RSI", "op": ">", "right": 70}
+    malformed = {"type": "indicator_compare", "left": "RSI"}
+    ind = {"RSI": 50.0}
+    assert not sg._compile_rule({"conditions": [rsi_high, malformed], "logic": "AND"})(ind)
+    with pytest.raises(KeyError):
+        sg._compile_rule({"conditions": [malformed, rsi_high], "logic": "AND"})(ind)
+
+
+_VECTOR_GENOMES = [
+    *(g.to_dict() for g in create_seed_genomes()),
+    {
+        "indicators": [{"type": "BB", "period": 10, "std_dev": 1.5}, {"type": "BB", "period": 120, "std_dev": 2.0},
+                       {"type": "EMA", "period": 200, "source": "low"}, {"type": "ATR", "period": 14}],
+        "entry_long": {"conditions": [
+            {"type": "price_compare", "left": "close", "op": ">", "right": "BB_upper"},
+            {"type": "price_compare", "left": "low", "op": ">", "right": "EMA_200"},
+        ], "logic": "OR"},
+        "confirm_bars": 3,
+    },
+    *({
+        "indicators": [{"type": "EMA", "period": period, "source": "close"}, {"type": "SMA", "period": 250}],
+        "entry_long": {"conditions": [
+            {"type": "price_compare", "left": "close", "op": ">", "right": f"EMA_{period}"},
+        ]},
+    } for period in (50, 100, 200)),
+]
+
+
+@pytest.mark.parametrize("lookback", [1, 30, 200])
+@pytest.mark.parametrize("genome", _VECTOR_GENOMES)
+def test_run_vectorized_matches_on_bar_windows(genome, lookback):
+    """Same exposures as calling on_bar at every bar with the trailing `lookback` bars."""
+    np = pytest.importorskip("numpy")
+    highs, lows, closes = _ohlc(700)
+    bars = [Bar(ts=i, open=c, high=h, low=l, close=c, volume=1.0)
+            for i, (h, l, c) in enumerate(zip(highs, lows, closes))]
+    stepped = sg.GenomeStrategy(sg.StrategyGenome.from_dict(genome))
+    expected = [stepped.on_bar(bars[max(0, i - lookback + 1):i + 1]) for i in range(len(bars))]
+
+    strategy = sg.GenomeStrategy(sg.StrategyGenome.from_dict(genome))
+    got = strategy.run_vectorized(np.array(closes), np.array(highs), np.array(lows), lookback=lookback)
+    assert got.tolist() == expected
+
+
+def test_backtester_matches_windowed_on_bar():
+    pytest.importorskip("numpy")
+    from app.backtest import Backtester
+
+    class OnBarOnly:  # no run_vectorized: Backtester feeds on_bar windows
+        def __init__(self, genome):
+            self.on_bar = sg.GenomeStrategy(genome).on_bar
+
+    highs, lows, closes = _ohlc(500)
+    bars = [Bar(ts=i * 86400, open=c, high=h, low=l, close=c, volume=1.0)
+            for i, (h, l, c) in enumerate(zip(highs, lows, closes))]
+    for genome in create_seed_genomes():
+        vectorized = Backtester(min_notional=10.0).run_on_bars(sg.GenomeStrategy(genome), bars, "1d")
+        stepped = Backtester(min_notional=10.0).run_on_bars(OnBarOnly(genome), bars, "1d")
+        assert vectorized.to_dict() == stepped.to_dict()
+
+
+def test_vectorized_series_are_shared_per_price_data():
+    np = pytest.importorskip("numpy")
+    sg.clear_indicator_cache()
+    highs, lows, closes = (np.array(x) for x in _ohlc(120))
+    genome = sg.StrategyGenome(
+        indicators=[{"type": "SMA", "period": 20, "source": "close"}],
+        entry_long={"conditions": [{"type": "price_compare", "left": "close", "op": ">", "right": "SMA_20"}]},
+    )
+    first = sg.GenomeStrategy(genome).run_vectorized(closes, highs, lows, lookback=1)
+    assert len(sg._series_cache) == 1
+    assert sg.GenomeStrategy(genome).run_vectorized(closes.copy(), highs, lows, lookback=1).tolist() == first.tolist()
+    assert len(sg._series_cache) == 1  # same prices, new array: reused
+    sg.GenomeStrategy(genome).run_vectorized(closes * 1.01, highs, lows, lookback=1)
+    assert len(sg._series_cache) == 2
+    sg.clear_indicator_cache()
+
+
+def test_mutate_and_crossover_leave_parents_untouched():
+    import json
+    random.seed(7)
+    population = create_seed_genomes()
+    snapshot = [json.dumps(g.to_dict(), sort_keys=True) for g in population]
+    for _ in range(300):
+        if random.random() < 0.6:
+            population.append(random.choice(population).mutate())
+        else:
+            population.append(sg.StrategyGenome.crossover(random.choice(population), random.choice(population)))
+        snapshot.append(json.dumps(population[-1].to_dict(), sort_keys=True))
+    assert [json.dumps(g.to_dict(), sort_keys=True) for g in population] == snapshot
+
+    clone = population[0].clone()
+    clone.indicators[0]["period"] = 999
+    clone.entry_long["conditions"][0]["op"] = "=="
+    assert json.dumps(population[0].to_dict(), sort_keys=True) == snapshot[0]